@@ -1,69 +1,21 @@
 #!/usr/bin/env python3
 import os
-import json
+import sys
+import signal
+import hashlib
 import random
-import time
-import openai
-from getpass import getpass
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from collections import defaultdict
+from typing import List, Literal
 
-class TOEICPractice:
-    def __init__(self):
-        self.api_key = None
-        self.client = None
-        self.topics = [
-            "Office issues",
-            "Financial issues",
-            "Sales and marketing",
-            "Business transactions",
-            "Transportation",
-            "Tourism",
-            "Entertainment and dining out",
-            "Schedules"
-        ]
-        self.history_file = "part5_history.json"
-        self.history = self.load_history()
-        
-    def load_history(self):
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return {"sessions": [], "total_correct": 0, "total_questions": 0}
-        return {"sessions": [], "total_correct": 0, "total_questions": 0}
-    
-    def save_history(self):
-        with open(self.history_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
-    
-    def setup_api(self):
-        # Check if API key is already set in environment
-        self.api_key = os.environ.get("OPENAI_API_KEY")
-        
-        if not self.api_key:
-            print("\nOpenAI API key not found in environment variables.")
-            self.api_key = getpass("Please enter your OpenAI API key: ")
-            # Ask if user wants to save the API key to environment
-            save_key = input("Would you like to save this API key for future sessions? (y/n): ").lower()
-            if save_key == 'y':
-                with open(os.path.expanduser("~/.bashrc"), "a") as f:
-                    f.write(f'\nexport OPENAI_API_KEY="{self.api_key}"\n')
-                print("API key saved to ~/.bashrc. Please restart your terminal or run 'source ~/.bashrc' to apply.")
-        
-        try:
-            self.client = openai.OpenAI(api_key=self.api_key)
-            print("API connection established successfully!")
-            return True
-        except Exception as e:
-            print(f"Error setting up OpenAI API: {e}")
-            return False
-    
-    def generate_question(self, topic=None):
-        if not topic:
-            topic = random.choice(self.topics)
-        
-        prompt = f"""
+# toeic_common.py lives one directory up, shared with the other reading parts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toeic_common import BaseTOEICPractice, parse_json, JSON_OBJECT, JSON_ARRAY, OPTION_LETTERS
+
+# Prompt templates, filled in with str.format for each request
+_QUESTION_PROMPT_TEMPLATE = """
         Generate a TOEIC Part 5 practice question (Incomplete Sentences) on the topic of {topic}.
         
         The question should be a single sentence with one blank, and provide four options (A, B, C, D) to fill in the blank.
@@ -83,21 +35,95 @@ class TOEICPractice:
         
         The difficulty should be appropriate for TOEIC test takers (intermediate to advanced English).
         """
+
+_BATCH_PROMPT_TEMPLATE = """
+        Generate {count} independent TOEIC Part 5 practice questions (Incomplete Sentences), one for each of these topics:
+{spec_lines}
+        
+        Each question should be a single sentence with one blank, and provide four options (A, B, C, D) to fill in the blank.
+        Only ONE option should be correct. Include an explanation of why the correct answer is right and why the others are wrong.
+        
+        Format the response as a JSON array of {count} objects, in the same order as the topics above. Each object has these fields:
+        - sentence: The incomplete sentence with a blank indicated by "___"
+        - options: An array of 4 options (A, B, C, D)
+        - correct_answer: The letter of the correct option (A, B, C, or D)
+        - explanation: A detailed explanation of the correct answer
+        - topic: The topic of the question
+        
+        Make sure each question tests one of these skills:
+        - Vocabulary (similar words with different meanings, phrasal verbs)
+        - Word forms (noun, pronoun, verb, adjective, adverb, infinitive, gerund)
+        - Grammar (subject, verb, object, complement, preposition, adjective)
+        
+        The difficulty should be appropriate for TOEIC test takers (intermediate to advanced English).
+        """
+
+# Changes whenever a prompt template is edited, retiring stale cache entries
+_PROMPT_HASH = hashlib.blake2b((_QUESTION_PROMPT_TEMPLATE + _BATCH_PROMPT_TEMPLATE).encode(), digest_size=4).hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def _question_adapters():
+    """Return the adapters for one question and for a list of questions.
+    
+    They parse and validate generated questions against the schema in one
+    step. pydantic is imported here, so viewing statistics doesn't load it.
+    """
+    from pydantic import BaseModel, Field, TypeAdapter
+    
+    class Question(BaseModel):
+        sentence: str
+        options: List[str] = Field(min_length=4, max_length=4)
+        correct_answer: Literal['A', 'B', 'C', 'D']
+        explanation: str
+        topic: str
+    
+    return TypeAdapter(Question), TypeAdapter(List[Question])
+
+class TOEICPractice(BaseTOEICPractice):
+    topics = [
+        "Office issues",
+        "Financial issues",
+        "Sales and marketing",
+        "Business transactions",
+        "Transportation",
+        "Tourism",
+        "Entertainment and dining out",
+        "Schedules"
+    ]
+    history_file = "part5_history.jsonl"
+    legacy_history_file = "part5_history.json"
+    cache_file = "part5_cache.json"
+    
+    def _count_questions(self, session):
+        return len(session['questions'])
+    
+    def _cache_key(self, topic):
+        # The template hash makes stale entries unreachable when the prompt changes
+        return f"{topic}|{_PROMPT_HASH}"
+    
+    def generate_question(self, topic=None):
+        if not topic:
+            topic = random.choice(self.topics)
+        
+        prompt = _QUESTION_PROMPT_TEMPLATE.format(topic=topic)
+        cache_key = self._cache_key(topic)
+        cached = self._get_cached(cache_key)
+        if cached:
+            return cached
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}]
-                # Removed response_format parameter as it might not be supported
-            )
+            content = self._complete(prompt)
             
-            # Parse the response content as JSON
+            # Parse the response content as JSON; pydantic's ValidationError
+            # is a ValueError
+            question_adapter, _ = _question_adapters()
             try:
-                result = json.loads(response.choices[0].message.content)
+                result = parse_json(content, question_adapter, JSON_OBJECT).model_dump()
+                self._add_to_cache(cache_key, result)
+                self.save_cache()
                 return result
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract information manually
-                content = response.choices[0].message.content
+            except ValueError:
+                # Nothing usable could be recovered, so fall back to a placeholder
                 print("Warning: Could not parse response as JSON. Using fallback method.")
                 
                 # Create a basic structure for the result
@@ -114,12 +140,51 @@ class TOEICPractice:
             print(f"Error generating question: {e}")
             return None
     
+    def generate_questions_batch(self, num_questions, topic=None):
+        """Generate several questions with a single API request."""
+        questions = [None] * num_questions
+        specs = []
+        for i in range(num_questions):
+            question_topic = topic if topic else random.choice(self.topics)
+            cache_key = self._cache_key(question_topic)
+            questions[i] = self._get_cached(cache_key)
+            if not questions[i]:
+                specs.append((i, question_topic, cache_key))
+        
+        if not specs:
+            return questions
+        
+        spec_lines = "\n".join(
+            f"        {n}. Topic: {question_topic}"
+            for n, (_, question_topic, _) in enumerate(specs, 1)
+        )
+        prompt = _BATCH_PROMPT_TEMPLATE.format(count=len(specs), spec_lines=spec_lines)
+        
+        _, question_list_adapter = _question_adapters()
+        try:
+            results = parse_json(self._complete(prompt, show_progress=False), question_list_adapter, JSON_ARRAY)
+        except ValueError:
+            # Questions missing from the batch are generated one by one later
+            print("Warning: Could not parse batched questions as JSON.")
+            return questions
+        except Exception as e:
+            print(f"Error generating questions: {e}")
+            return questions
+        
+        for (i, _, cache_key), result in zip(specs, results):
+            result = result.model_dump()
+            questions[i] = result
+            self._add_to_cache(cache_key, result)
+        self.save_cache()
+        
+        return questions
+    
     def display_question(self, question):
         print("\n" + "=" * 80)
         print(f"Topic: {question['topic']}\n")
         print(question['sentence'])
         print("\nOptions:")
-        for i, option in enumerate(['A', 'B', 'C', 'D']):
+        for i, option in enumerate(OPTION_LETTERS):
             print(f"{option}. {question['options'][i]}")
         print("=" * 80)
     
@@ -134,9 +199,23 @@ class TOEICPractice:
             "total": num_questions
         }
         
+        # Show the first question as soon as it is ready and generate the rest
+        # with one batched request in the background while the user answers
+        print(f"\nGenerating question 1/{num_questions}...")
+        first_question = self.generate_question(topic)
+        executor = ThreadPoolExecutor(max_workers=1)
+        remaining_future = executor.submit(self.generate_questions_batch, num_questions - 1, topic)
+        
+        record_question = session['questions'].append
         for i in range(num_questions):
-            print(f"\nGenerating question {i+1}/{num_questions}...")
-            question = self.generate_question(topic)
+            if i == 0:
+                question = first_question
+            else:
+                if not remaining_future.done():
+                    print(f"\nGenerating question {i+1}/{num_questions}...")
+                question = remaining_future.result()[i - 1]
+                if not question:
+                    question = self.generate_question(topic)
             
             if not question:
                 print("Failed to generate question. Skipping...")
@@ -145,11 +224,7 @@ class TOEICPractice:
             self.display_question(question)
             
             # Get user answer
-            while True:
-                user_answer = input("\nYour answer (A/B/C/D or 'q' to quit): ").upper()
-                if user_answer in ['A', 'B', 'C', 'D', 'Q']:
-                    break
-                print("Invalid input. Please enter A, B, C, D, or Q.")
+            user_answer = self._get_valid_answer()
             
             if user_answer == 'Q':
                 print("\nSession ended early.")
@@ -166,7 +241,7 @@ class TOEICPractice:
             if is_correct:
                 session['correct'] += 1
             
-            session['questions'].append({
+            record_question({
                 "sentence": question['sentence'],
                 "user_answer": user_answer,
                 "correct_answer": question['correct_answer'],
@@ -178,62 +253,27 @@ class TOEICPractice:
             if i < num_questions - 1:
                 input("\nPress Enter for the next question...")
         
-        # Update history
-        self.history['sessions'].append(session)
-        self.history['total_correct'] += session['correct']
-        self.history['total_questions'] += len(session['questions'])
-        self.save_history()
+        # Don't block on any background generation the user no longer needs
+        executor.shutdown(wait=False)
         
-        # Show session summary
-        print("\n" + "=" * 80)
-        print(f"Session Summary: {session['correct']}/{len(session['questions'])} correct")
-        if len(session['questions']) > 0:
-            percentage = (session['correct'] / len(session['questions'])) * 100
-            print(f"Accuracy: {percentage:.1f}%")
-        print("=" * 80)
+        self._finish_session(session, len(session['questions']))
     
-    def show_stats(self):
-        print("\n" + "=" * 80)
-        print("TOEIC Practice Statistics")
-        print("=" * 80)
-        
-        if not self.history['sessions']:
-            print("No practice sessions recorded yet.")
-            return
-        
-        total_correct = self.history['total_correct']
-        total_questions = self.history['total_questions']
-        
-        print(f"Total Sessions: {len(self.history['sessions'])}")
-        print(f"Total Questions Attempted: {total_questions}")
-        print(f"Total Correct Answers: {total_correct}")
-        
-        if total_questions > 0:
-            overall_accuracy = (total_correct / total_questions) * 100
-            print(f"Overall Accuracy: {overall_accuracy:.1f}%")
-        
+    def _show_breakdown(self):
         # Topic performance
-        topic_stats = {}
+        topic_stats = defaultdict(lambda: [0, 0])
         for session in self.history['sessions']:
             for q in session['questions']:
-                topic = q.get('topic', 'Unknown')
-                if topic not in topic_stats:
-                    topic_stats[topic] = {'correct': 0, 'total': 0}
-                
-                topic_stats[topic]['total'] += 1
-                if q['is_correct']:
-                    topic_stats[topic]['correct'] += 1
-        
-        if topic_stats:
-            print("\nPerformance by Topic:")
-            for topic, stats in topic_stats.items():
-                if stats['total'] > 0:
-                    accuracy = (stats['correct'] / stats['total']) * 100
-                    print(f"{topic}: {stats['correct']}/{stats['total']} ({accuracy:.1f}%)")
+                topic_entry = topic_stats[q.get('topic', 'Unknown')]
+                topic_entry[0] += q['is_correct']
+                topic_entry[1] += 1
         
-        print("=" * 80)
+        self._print_accuracy_table("Performance by Topic", topic_stats)
 
 def main():
+    # Turn SIGTERM into a normal exit so buffered history is flushed; Ctrl-C
+    # already unwinds through KeyboardInterrupt and the atexit hook
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    
     print("\n" + "=" * 80)
     print("TOEIC Part 5 Practice Tool - Incomplete Sentences")
     print("=" * 80)
@@ -261,21 +301,7 @@ def main():
                     print("Please enter a valid number.")
             
             # Ask for specific topic or random
-            print("\nAvailable topics:")
-            for i, topic in enumerate(practice.topics, 1):
-                print(f"{i}. {topic}")
-            print(f"{len(practice.topics) + 1}. Random (mix of topics)")
-            
-            while True:
-                try:
-                    topic_choice = int(input(f"\nChoose a topic (1-{len(practice.topics) + 1}): "))
-                    if 1 <= topic_choice <= len(practice.topics) + 1:
-                        break
-                    print(f"Please enter a number between 1 and {len(practice.topics) + 1}.")
-                except ValueError:
-                    print("Please enter a valid number.")
-            
-            selected_topic = None if topic_choice == len(practice.topics) + 1 else practice.topics[topic_choice - 1]
+            selected_topic = practice._topic_menu()
             practice.practice_session(num, selected_topic)
             
         elif choice == '2':
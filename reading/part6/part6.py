@@ -1,85 +1,56 @@
 #!/usr/bin/env python3
 import os
-import json
+import sys
+import signal
+import hashlib
 import random
-import time
-import openai
-from getpass import getpass
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from collections import defaultdict
+from typing import List, Literal
 
-class TOEICPractice:
-    def __init__(self):
-        self.api_key = None
-        self.client = None
-        self.topics = [
-            "Letters and memos",
-            "Advertisements",
-            "Instructions",
-            "Articles",
-            "E-mails",
-            "Notices"
-        ]
-        self.passage_types = [
-            "Business letter",
-            "Email correspondence",
-            "Advertisement",
-            "Notice",
-            "Article",
-            "Instructions",
-            "Memo"
-        ]
-        self.history_file = "part6_history.json"
-        self.history = self.load_history()
-        
-    def load_history(self):
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return {"passages": [], "total_correct": 0, "total_questions": 0}
-        return {"passages": [], "total_correct": 0, "total_questions": 0}
-    
-    def save_history(self):
-        with open(self.history_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
-    
-    def setup_api(self):
-        # Check if API key is already set in environment
-        self.api_key = os.environ.get("OPENAI_API_KEY")
+# toeic_common.py lives one directory up, shared with the other reading parts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toeic_common import BaseTOEICPractice, parse_json, JSON_OBJECT, JSON_ARRAY, OPTION_LETTERS
+
+# Prompt templates, filled in with str.format for each request
+_PASSAGE_PROMPT_TEMPLATE = """
+        Generate a TOEIC Part 6 practice passage (Text Completion) on the topic of {topic} in the format of a {passage_type}.
         
-        if not self.api_key:
-            print("\nOpenAI API key not found in environment variables.")
-            self.api_key = getpass("Please enter your OpenAI API key: ")
-            # Ask if user wants to save the API key to environment
-            save_key = input("Would you like to save this API key for future sessions? (y/n): ").lower()
-            if save_key == 'y':
-                with open(os.path.expanduser("~/.bashrc"), "a") as f:
-                    f.write(f'\nexport OPENAI_API_KEY="{self.api_key}"\n')
-                print("API key saved to ~/.bashrc. Please restart your terminal or run 'source ~/.bashrc' to apply.")
+        The passage should be a short text (4-6 sentences) with THREE incomplete sentences that have blanks indicated by "___".
+        For each blank, provide four options (A, B, C, D) to fill in the blank.
+        Only ONE option should be correct for each blank. Include an explanation of why each correct answer is right and why the others are wrong.
         
-        try:
-            self.client = openai.OpenAI(api_key=self.api_key)
-            print("API connection established successfully!")
-            return True
-        except Exception as e:
-            print(f"Error setting up OpenAI API: {e}")
-            return False
-    
-    def generate_passage(self, topic=None):
-        if not topic:
-            topic = random.choice(self.topics)
+        Format the response as a JSON object with these fields:
+        - passage_title: A title for the passage
+        - passage_text: The full text with THREE blanks indicated by "___"
+        - questions: An array of 3 objects, each containing:
+          - blank_number: The number of the blank (1, 2, or 3)
+          - options: An array of 4 options (A, B, C, D)
+          - correct_answer: The letter of the correct option (A, B, C, or D)
+          - explanation: A detailed explanation of the correct answer
+        - passage_type: The type of passage (e.g., email, letter, notice)
+        - topic: The topic of the passage
         
-        passage_type = random.choice(self.passage_types)
+        Make sure the questions test these skills:
+        - Vocabulary (similar words with different meanings, phrasal verbs)
+        - Word forms (noun, pronoun, verb, adjective, adverb, infinitive, gerund)
+        - Grammar (subject, verb, object, complement, preposition, adjective)
+        - Words in context (choosing the correct word that fits the context)
         
-        prompt = f"""
-        Generate a TOEIC Part 6 practice passage (Text Completion) on the topic of {topic} in the format of a {passage_type}.
+        The difficulty should be appropriate for TOEIC test takers (intermediate to advanced English).
+        """
+
+_BATCH_PROMPT_TEMPLATE = """
+        Generate {count} independent TOEIC Part 6 practice passages (Text Completion), one for each of these specifications:
+{spec_lines}
         
-        The passage should be a short text (4-6 sentences) with THREE incomplete sentences that have blanks indicated by "___".
+        Each passage should be a short text (4-6 sentences) with THREE incomplete sentences that have blanks indicated by "___".
         For each blank, provide four options (A, B, C, D) to fill in the blank.
         Only ONE option should be correct for each blank. Include an explanation of why each correct answer is right and why the others are wrong.
         
-        Format the response as a JSON object with these fields:
+        Format the response as a JSON array of {count} objects, in the same order as the specifications above. Each object has these fields:
         - passage_title: A title for the passage
         - passage_text: The full text with THREE blanks indicated by "___"
         - questions: An array of 3 objects, each containing:
@@ -98,20 +69,90 @@ class TOEICPractice:
         
         The difficulty should be appropriate for TOEIC test takers (intermediate to advanced English).
         """
+
+# Changes whenever a prompt template is edited, retiring stale cache entries
+_PROMPT_HASH = hashlib.blake2b((_PASSAGE_PROMPT_TEMPLATE + _BATCH_PROMPT_TEMPLATE).encode(), digest_size=4).hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def _passage_adapters():
+    """Return the adapters for one passage and for a list of passages.
+    
+    They parse and validate generated passages against the schema in one
+    step. pydantic is imported here, so viewing statistics doesn't load it.
+    """
+    from pydantic import BaseModel, Field, TypeAdapter
+    
+    class Question(BaseModel):
+        blank_number: int
+        options: List[str] = Field(min_length=4, max_length=4)
+        correct_answer: Literal['A', 'B', 'C', 'D']
+        explanation: str
+    
+    class Passage(BaseModel):
+        passage_title: str
+        passage_text: str
+        questions: List[Question] = Field(min_length=3, max_length=3)
+        passage_type: str
+        topic: str
+    
+    return TypeAdapter(Passage), TypeAdapter(List[Passage])
+
+class TOEICPractice(BaseTOEICPractice):
+    topics = [
+        "Letters and memos",
+        "Advertisements",
+        "Instructions",
+        "Articles",
+        "E-mails",
+        "Notices"
+    ]
+    passage_types = [
+        "Business letter",
+        "Email correspondence",
+        "Advertisement",
+        "Notice",
+        "Article",
+        "Instructions",
+        "Memo"
+    ]
+    history_file = "part6_history.jsonl"
+    legacy_history_file = "part6_history.json"
+    cache_file = "part6_cache.json"
+    history_key = "passages"
+    stats_title = "TOEIC Part 6 Practice Statistics"
+    
+    def _count_questions(self, session):
+        return sum(len(p['questions']) for p in session['passages'])
+    
+    def _cache_key(self, topic, passage_type):
+        # The template hash makes stale entries unreachable when the prompt changes
+        return f"{topic}|{passage_type}|{_PROMPT_HASH}"
+    
+    def generate_passage(self, topic=None):
+        if not topic:
+            topic = random.choice(self.topics)
+        
+        passage_type = random.choice(self.passage_types)
+        
+        prompt = _PASSAGE_PROMPT_TEMPLATE.format(topic=topic, passage_type=passage_type)
+        cache_key = self._cache_key(topic, passage_type)
+        cached = self._get_cached(cache_key)
+        if cached:
+            return cached
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}]
-            )
+            content = self._complete(prompt)
             
-            # Parse the response content as JSON
+            # Parse the response content as JSON; pydantic's ValidationError
+            # is a ValueError
+            passage_adapter, _ = _passage_adapters()
             try:
-                result = json.loads(response.choices[0].message.content)
+                result = parse_json(content, passage_adapter, JSON_OBJECT).model_dump()
+                self._add_to_cache(cache_key, result)
+                self.save_cache()
                 return result
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract information manually
-                content = response.choices[0].message.content
+            except ValueError:
+                # Nothing usable could be recovered, so fall back to a placeholder
                 print("Warning: Could not parse response as JSON. Using fallback method.")
                 
                 # Create a basic structure for the result
@@ -147,6 +188,46 @@ class TOEICPractice:
             print(f"Error generating passage: {e}")
             return None
     
+    def generate_passages_batch(self, num_passages, topic=None):
+        """Generate several passages with a single API request."""
+        passages = [None] * num_passages
+        specs = []
+        for i in range(num_passages):
+            passage_topic = topic if topic else random.choice(self.topics)
+            passage_type = random.choice(self.passage_types)
+            cache_key = self._cache_key(passage_topic, passage_type)
+            passages[i] = self._get_cached(cache_key)
+            if not passages[i]:
+                specs.append((i, passage_topic, passage_type, cache_key))
+        
+        if not specs:
+            return passages
+        
+        spec_lines = "\n".join(
+            f"        {n}. Topic: {passage_topic} | Format: {passage_type}"
+            for n, (_, passage_topic, passage_type, _) in enumerate(specs, 1)
+        )
+        prompt = _BATCH_PROMPT_TEMPLATE.format(count=len(specs), spec_lines=spec_lines)
+        
+        _, passage_list_adapter = _passage_adapters()
+        try:
+            results = parse_json(self._complete(prompt, show_progress=False), passage_list_adapter, JSON_ARRAY)
+        except ValueError:
+            # Passages missing from the batch are generated one by one later
+            print("Warning: Could not parse batched passages as JSON.")
+            return passages
+        except Exception as e:
+            print(f"Error generating passages: {e}")
+            return passages
+        
+        for (i, _, _, cache_key), result in zip(specs, results):
+            result = result.model_dump()
+            passages[i] = result
+            self._add_to_cache(cache_key, result)
+        self.save_cache()
+        
+        return passages
+    
     def display_passage(self, passage):
         print("\n" + "=" * 80)
         print(f"Topic: {passage['topic']} | Type: {passage['passage_type']}\n")
@@ -157,7 +238,7 @@ class TOEICPractice:
     def display_question(self, question):
         print(f"\nQuestion {question['blank_number']}:")
         print("Options:")
-        for i, option in enumerate(['A', 'B', 'C', 'D']):
+        for i, option in enumerate(OPTION_LETTERS):
             print(f"{option}. {question['options'][i]}")
     
     def practice_session(self, num_passages=2, topic=None):
@@ -168,12 +249,27 @@ class TOEICPractice:
             "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
             "passages": [],
             "correct": 0,
-            "total": num_passages * 3  # Each passage has 3 questions
+            "total": 0  # Updated once the session ends
         }
+        total_answered = 0
+        
+        # Show the first passage as soon as it is ready and generate the rest
+        # with one batched request in the background while the user answers
+        print(f"\nGenerating passage 1/{num_passages}...")
+        first_passage = self.generate_passage(topic)
+        executor = ThreadPoolExecutor(max_workers=1)
+        remaining_future = executor.submit(self.generate_passages_batch, num_passages - 1, topic)
         
+        add_passage = session['passages'].append
         for i in range(num_passages):
-            print(f"\nGenerating passage {i+1}/{num_passages}...")
-            passage = self.generate_passage(topic)
+            if i == 0:
+                passage = first_passage
+            else:
+                if not remaining_future.done():
+                    print(f"\nGenerating passage {i+1}/{num_passages}...")
+                passage = remaining_future.result()[i - 1]
+                if not passage:
+                    passage = self.generate_passage(topic)
             
             if not passage:
                 print("Failed to generate passage. Skipping...")
@@ -188,15 +284,12 @@ class TOEICPractice:
             
             self.display_passage(passage)
             
+            record_answer = passage_result['questions'].append
             for question in passage['questions']:
                 self.display_question(question)
                 
                 # Get user answer
-                while True:
-                    user_answer = input("\nYour answer (A/B/C/D or 'q' to quit): ").upper()
-                    if user_answer in ['A', 'B', 'C', 'D', 'Q']:
-                        break
-                    print("Invalid input. Please enter A, B, C, D, or Q.")
+                user_answer = self._get_valid_answer()
                 
                 if user_answer == 'Q':
                     print("\nSession ended early.")
@@ -212,8 +305,9 @@ class TOEICPractice:
                 # Record result
                 if is_correct:
                     session['correct'] += 1
+                total_answered += 1
                 
-                passage_result['questions'].append({
+                record_answer({
                     "blank_number": question['blank_number'],
                     "user_answer": user_answer,
                     "correct_answer": question['correct_answer'],
@@ -224,95 +318,48 @@ class TOEICPractice:
                 if user_answer == 'Q':
                     break
             
+            # Add passage result to session, keeping answers given before quitting
+            if passage_result['questions']:
+                add_passage(passage_result)
+            
             # If user quit during questions, break out of passages loop
             if user_answer == 'Q':
                 break
-                
-            # Add passage result to session
-            session['passages'].append(passage_result)
             
             # Pause between passages
             if i < num_passages - 1:
                 input("\nPress Enter for the next passage...")
         
-        # Update history
-        self.history['passages'].append(session)
-        self.history['total_correct'] += session['correct']
-        self.history['total_questions'] += sum(len(p['questions']) for p in session['passages'])
-        self.save_history()
+        # Don't block on any background generation the user no longer needs
+        executor.shutdown(wait=False)
         
-        # Show session summary
-        total_questions = sum(len(p['questions']) for p in session['passages'])
-        print("\n" + "=" * 80)
-        print(f"Session Summary: {session['correct']}/{total_questions} correct")
-        if total_questions > 0:
-            percentage = (session['correct'] / total_questions) * 100
-            print(f"Accuracy: {percentage:.1f}%")
-        print("=" * 80)
+        self._finish_session(session, total_answered)
     
-    def show_stats(self):
-        print("\n" + "=" * 80)
-        print("TOEIC Part 6 Practice Statistics")
-        print("=" * 80)
-        
-        if not self.history['passages']:
-            print("No practice sessions recorded yet.")
-            return
-        
-        total_correct = self.history['total_correct']
-        total_questions = self.history['total_questions']
-        
-        print(f"Total Sessions: {len(self.history['passages'])}")
-        print(f"Total Questions Attempted: {total_questions}")
-        print(f"Total Correct Answers: {total_correct}")
-        
-        if total_questions > 0:
-            overall_accuracy = (total_correct / total_questions) * 100
-            print(f"Overall Accuracy: {overall_accuracy:.1f}%")
-        
-        # Topic performance
-        topic_stats = {}
+    def _show_breakdown(self):
+        # Topic and passage type performance, gathered in a single pass
+        topic_stats = defaultdict(lambda: [0, 0])
+        type_stats = defaultdict(lambda: [0, 0])
         for session in self.history['passages']:
             for passage in session['passages']:
-                topic = passage.get('topic', 'Unknown')
-                if topic not in topic_stats:
-                    topic_stats[topic] = {'correct': 0, 'total': 0}
+                questions = passage['questions']
+                correct = sum(1 for q in questions if q['is_correct'])
                 
-                for q in passage['questions']:
-                    topic_stats[topic]['total'] += 1
-                    if q['is_correct']:
-                        topic_stats[topic]['correct'] += 1
-        
-        if topic_stats:
-            print("\nPerformance by Topic:")
-            for topic, stats in topic_stats.items():
-                if stats['total'] > 0:
-                    accuracy = (stats['correct'] / stats['total']) * 100
-                    print(f"{topic}: {stats['correct']}/{stats['total']} ({accuracy:.1f}%)")
-        
-        # Passage type performance
-        type_stats = {}
-        for session in self.history['passages']:
-            for passage in session['passages']:
-                p_type = passage.get('passage_type', 'Unknown')
-                if p_type not in type_stats:
-                    type_stats[p_type] = {'correct': 0, 'total': 0}
+                topic_entry = topic_stats[passage.get('topic', 'Unknown')]
+                topic_entry[0] += correct
+                topic_entry[1] += len(questions)
                 
-                for q in passage['questions']:
-                    type_stats[p_type]['total'] += 1
-                    if q['is_correct']:
-                        type_stats[p_type]['correct'] += 1
-        
-        if type_stats:
-            print("\nPerformance by Passage Type:")
-            for p_type, stats in type_stats.items():
-                if stats['total'] > 0:
-                    accuracy = (stats['correct'] / stats['total']) * 100
-                    print(f"{p_type}: {stats['correct']}/{stats['total']} ({accuracy:.1f}%)")
+                type_entry = type_stats[passage.get('passage_type', 'Unknown')]
+                type_entry[0] += correct
+                type_entry[1] += len(questions)
         
-        print("=" * 80)
+        self._print_accuracy_table("Performance by Topic", topic_stats)
+        self._print_accuracy_table("Performance by Passage Type", type_stats)
 
 def main():
+    # Turn SIGTERM into a normal exit so buffered history is flushed; Ctrl-C
+    # already unwinds through KeyboardInterrupt and the atexit hook
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    
     print("\n" + "=" * 80)
     print("TOEIC Part 6 Practice Tool - Text Completion")
     print("=" * 80)
@@ -340,21 +387,7 @@ def main():
                     print("Please enter a valid number.")
             
             # Ask for specific topic or random
-            print("\nAvailable topics:")
-            for i, topic in enumerate(practice.topics, 1):
-                print(f"{i}. {topic}")
-            print(f"{len(practice.topics) + 1}. Random (mix of topics)")
-            
-            while True:
-                try:
-                    topic_choice = int(input(f"\nChoose a topic (1-{len(practice.topics) + 1}): "))
-                    if 1 <= topic_choice <= len(practice.topics) + 1:
-                        break
-                    print(f"Please enter a number between 1 and {len(practice.topics) + 1}.")
-                except ValueError:
-                    print("Please enter a valid number.")
-            
-            selected_topic = None if topic_choice == len(practice.topics) + 1 else practice.topics[topic_choice - 1]
+            selected_topic = practice._topic_menu()
             practice.practice_session(num, selected_topic)
             
         elif choice == '2':
@@ -1,17 +1,198 @@
 #!/usr/bin/env python3
 import os
+import re
+import sys
 import json
 import random
-import time
+import sqlite3
+import hashlib
+import asyncio
+import threading
+import httpx
 import openai
 from getpass import getpass
 from datetime import datetime
+from typing import Annotated, List, Literal, Union
+
+# h2 is optional - lets concurrent requests share one HTTP/2 connection if available
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+# msgspec is optional - will be used to validate generated passages if available
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# toeic_common.py lives one directory up, shared with the other reading parts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from toeic_common import (
+    _json_loads, _json_dumps, _json_line, VALID_ANSWERS, OPTION_LETTERS,
+    CACHE_POOL_SIZE, CACHE_REUSE_PROBABILITY
+)
+
+# Instructions shared by every request. It never changes between calls, so
+# OpenAI's prompt caching can reuse it; the user message carries the specifics
+_SYSTEM_PROMPT = """You generate TOEIC Part 7 (Reading Comprehension) practice material for intermediate to advanced English learners.
+
+Passages:
+- A single passage is one comprehensive text; a double passage is two related texts that complement each other.
+- Passages should be of appropriate length for TOEIC Part 7 (approximately 300-500 words in total).
+
+Questions:
+- Each question has four options (A, B, C, D), and only ONE option is correct.
+- Include a mix of these question types:
+  - Main idea questions (What is the passage mainly about?)
+  - Detail questions (According to the passage, what...?)
+  - Inference questions (What can be inferred about...?)
+  - Vocabulary questions (The word "X" in paragraph Y is closest in meaning to...)
+- Include an explanation of why the correct answer is right and why the others are wrong.
+
+When asked for JSON, describe a passage with these fields:
+- passage_title: A title for the passage or passages
+- passage_text: The full text of a single passage, or an array of the two texts of a double passage
+- questions: An array of objects, each containing:
+  - question_number: The number of the question
+  - question_text: The text of the question
+  - question_type: The type of question (Main idea, Detail, Inference, or Vocabulary)
+  - options: An array of 4 options (A, B, C, D)
+  - correct_answer: The letter of the correct option (A, B, C, or D)
+  - explanation: A detailed explanation of the correct answer
+- passage_type: The type of passage (Single passage or Double passage)
+- topic: The topic of the passage
+"""
+
+def _messages(prompt):
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+# Structured outputs need a newer model than the original gpt-4
+_MODEL = "gpt-4o"
+
+# Schema the API enforces on every generated passage, so responses always parse
+_QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question_number": {"type": "integer"},
+        "question_text": {"type": "string"},
+        "question_type": {"type": "string", "enum": ["Main idea", "Detail", "Inference", "Vocabulary"]},
+        "options": {"type": "array", "items": {"type": "string"}, "minItems": 4, "maxItems": 4},
+        "correct_answer": {"type": "string", "enum": ["A", "B", "C", "D"]},
+        "explanation": {"type": "string"}
+    },
+    "required": ["question_number", "question_text", "question_type", "options", "correct_answer", "explanation"],
+    "additionalProperties": False
+}
+
+_PASSAGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "passage_title": {"type": "string"},
+        "passage_text": {
+            "anyOf": [
+                {"type": "string"},
+                {"type": "array", "items": {"type": "string"}}
+            ]
+        },
+        "questions": {"type": "array", "items": _QUESTION_SCHEMA, "minItems": 2, "maxItems": 5},
+        "passage_type": {"type": "string", "enum": ["Single passage", "Double passage"]},
+        "topic": {"type": "string"}
+    },
+    "required": ["passage_title", "passage_text", "questions", "passage_type", "topic"],
+    "additionalProperties": False
+}
+
+_PASSAGE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "toeic_part7_passage", "strict": True, "schema": _PASSAGE_SCHEMA}
+}
+
+_QUESTIONS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "toeic_part7_questions",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"questions": {"type": "array", "items": _QUESTION_SCHEMA, "minItems": 2, "maxItems": 5}},
+            "required": ["questions"],
+            "additionalProperties": False
+        }
+    }
+}
+
+if msgspec is not None:
+    class Question(msgspec.Struct):
+        question_number: int
+        question_text: str
+        question_type: str
+        options: Annotated[List[str], msgspec.Meta(min_length=4, max_length=4)]
+        correct_answer: Literal['A', 'B', 'C', 'D']
+        explanation: str
+    
+    class Passage(msgspec.Struct):
+        passage_title: str
+        passage_text: Union[str, List[str]]
+        questions: Annotated[List[Question], msgspec.Meta(min_length=1)]
+        passage_type: Literal["Single passage", "Double passage"]
+        topic: str
+    
+    class PassageBatch(msgspec.Struct):
+        passages: List[Passage]
+    
+    class QuestionSet(msgspec.Struct):
+        questions: Annotated[List[Question], msgspec.Meta(min_length=1)]
+    
+    # Parse and validate generated JSON in a single pass
+    _PASSAGE_DECODER = msgspec.json.Decoder(Passage)
+    _PASSAGE_BATCH_DECODER = msgspec.json.Decoder(PassageBatch)
+    _QUESTION_SET_DECODER = msgspec.json.Decoder(QuestionSet)
+else:
+    _PASSAGE_DECODER = _PASSAGE_BATCH_DECODER = _QUESTION_SET_DECODER = None
+
+def _decode(content, decoder):
+    """Parse a generated JSON document, validating it when msgspec is installed.
+    
+    Raises ValueError if the document is malformed or doesn't fit the schema.
+    """
+    if decoder is None:
+        return _json_loads(content)
+    return msgspec.to_builtins(decoder.decode(content))
+
+# Line separating the two texts of a streamed double passage
+_PASSAGE_SEPARATOR = re.compile(r"\n\s*-{3,}\s*\n")
+
+_PASSAGES_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "toeic_part7_passages",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"passages": {"type": "array", "items": _PASSAGE_SCHEMA}},
+            "required": ["passages"],
+            "additionalProperties": False
+        }
+    }
+}
 
 class TOEICPractice:
+    # Set up once and shared by every instance, so the API key prompt, the
+    # connection pool and the event loop are only created the first time
+    _shared_client = None
+    _shared_loop = None
+    
     def __init__(self):
         self.api_key = None
-        self.client = None
-        self.topics = [
+        self.client = TOEICPractice._shared_client
+        self._loop = TOEICPractice._shared_loop
+        # One generator for every random pick in the tool
+        self._rng = random.Random()
+        self.topics = (
             "E-mails and letters",
             "Memos",
             "Advertisements",
@@ -20,32 +201,111 @@ class TOEICPractice:
             "Forms",
             "Charts and tables",
             "Graphs and schedules"
-        ]
-        self.passage_types = [
+        )
+        self.passage_types = (
             "Single passage",
             "Double passage"
-        ]
+        )
         self.question_types = [
             "Main idea",
             "Detail",
             "Inference",
             "Vocabulary"
         ]
-        self.history_file = "part7_history.json"
-        self.history = self.load_history()
-        
-    def load_history(self):
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return {"sessions": [], "total_correct": 0, "total_questions": 0}
-        return {"sessions": [], "total_correct": 0, "total_questions": 0}
+        self.db_file = "part7.db"
+        self.legacy_history_file = "part7_history.json"
+        self.cache_dir = "part7_cache"
+        self.batches_file = "part7_batches.json"
+        self.db = self.open_history()
+        
+    def open_history(self):
+        db = sqlite3.connect(self.db_file, isolation_level=None)
+        # WAL lets statistics be read while a session is being written, and
+        # NORMAL sync is safe with WAL while avoiding an fsync per commit
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA mmap_size=268435456")
+        db.execute("PRAGMA temp_store=MEMORY")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY,
+                date TEXT NOT NULL,
+                correct INTEGER NOT NULL,
+                total INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS passages (
+                id INTEGER PRIMARY KEY,
+                session_id INTEGER NOT NULL REFERENCES sessions(id),
+                passage_type TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                title TEXT
+            );
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY,
+                passage_id INTEGER NOT NULL REFERENCES passages(id),
+                question_number INTEGER,
+                question_type TEXT NOT NULL,
+                user_answer TEXT NOT NULL,
+                correct_answer TEXT NOT NULL,
+                is_correct INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS passages_session ON passages(session_id);
+            CREATE INDEX IF NOT EXISTS passages_type ON passages(passage_type);
+            CREATE INDEX IF NOT EXISTS questions_passage ON questions(passage_id);
+            CREATE INDEX IF NOT EXISTS questions_type ON questions(question_type);
+        """)
+        
+        if db.execute("SELECT NOT EXISTS (SELECT 1 FROM sessions)").fetchone()[0]:
+            self._import_legacy_history(db)
+        return db
     
-    def save_history(self):
-        with open(self.history_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
+    def _iter_legacy_sessions(self):
+        """Yield the sessions of the old JSON history file, oldest first."""
+        if not os.path.exists(self.legacy_history_file):
+            return
+        try:
+            with open(self.legacy_history_file, 'rb') as f:
+                yield from _json_loads(f.read()).get('sessions', [])
+        except json.JSONDecodeError:
+            return
+    
+    def _import_legacy_history(self, db):
+        # One-shot import of the JSON history file into the empty database
+        db.execute("BEGIN")
+        try:
+            for session in self._iter_legacy_sessions():
+                self._insert_session(db, session)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+    
+    def _insert_session(self, db, session):
+        session_id = db.execute(
+            "INSERT INTO sessions (date, correct, total) VALUES (?, ?, ?)",
+            (session['date'], session['correct'], session['total'])
+        ).lastrowid
+        for passage in session['passages']:
+            passage_id = db.execute(
+                "INSERT INTO passages (session_id, passage_type, topic, title) VALUES (?, ?, ?, ?)",
+                (session_id, passage['passage_type'], passage['topic'], passage.get('passage_title'))
+            ).lastrowid
+            db.executemany(
+                "INSERT INTO questions (passage_id, question_number, question_type, user_answer, correct_answer, is_correct)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(passage_id, q.get('question_number'), q['question_type'], q['user_answer'], q['correct_answer'], q['is_correct'])
+                 for q in passage['questions']]
+            )
+    
+    def save_history(self, session):
+        # One transaction per session; earlier sessions are never rewritten
+        self.db.execute("BEGIN")
+        try:
+            self._insert_session(self.db, session)
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
     
     def setup_api(self):
         # Check if API key is already set in environment
@@ -62,95 +322,324 @@ class TOEICPractice:
                 print("API key saved to ~/.bashrc. Please restart your terminal or run 'source ~/.bashrc' to apply.")
         
         try:
-            self.client = openai.OpenAI(api_key=self.api_key)
+            # Keep connections alive so batched and concurrent requests skip
+            # the TCP and TLS handshakes
+            http_client = openai.DefaultAsyncHttpxClient(
+                http2=h2 is not None,
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=8)
+            )
+            self.client = openai.AsyncOpenAI(api_key=self.api_key, http_client=http_client)
+            self._start_event_loop()
+            TOEICPractice._shared_client = self.client
+            TOEICPractice._shared_loop = self._loop
             print("API connection established successfully!")
             return True
         except Exception as e:
             print(f"Error setting up OpenAI API: {e}")
             return False
     
-    def generate_passage(self, passage_type=None, topic=None):
+    def _start_event_loop(self):
+        # API calls run on a background event loop so passages keep generating
+        # while the main thread waits for the user's answers
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+    
+    def _submit(self, coro):
+        """Schedule a coroutine on the background loop and return its future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    def _num_questions(self, passage_type):
+        return 5 if passage_type == "Double passage" else self._rng.randint(2, 4)
+    
+    def _build_prompt(self, passage_type, topic, num_questions):
+        return f"Generate a {passage_type} on the topic of {topic} with {num_questions} questions, as a JSON object."
+    
+    def _cache_bucket(self, passage_type, topic, prompt):
+        # Passages are grouped by type and topic; the model and prompt hash make
+        # stale entries unreachable when either changes
+        prompt_hash = hashlib.blake2b((_SYSTEM_PROMPT + prompt).encode(), digest_size=8).hexdigest()
+        return os.path.join(self.cache_dir, passage_type, topic, f"{_MODEL}-{prompt_hash}")
+    
+    def _get_cached_passage(self, cache_bucket):
+        # Reuse a previously generated passage once enough are cached
+        try:
+            names = os.listdir(cache_bucket)
+        except FileNotFoundError:
+            return None
+        if len(names) >= CACHE_POOL_SIZE and self._rng.random() < CACHE_REUSE_PROBABILITY:
+            # Validated like a fresh response, so a bad file is never served
+            try:
+                with open(os.path.join(cache_bucket, self._rng.choice(names)), 'rb') as f:
+                    return _decode(f.read(), _PASSAGE_DECODER)
+            except ValueError:
+                return None
+        return None
+    
+    def _cache_passage(self, cache_bucket, passage):
+        data = _json_dumps(passage)
+        os.makedirs(cache_bucket, exist_ok=True)
+        with open(os.path.join(cache_bucket, hashlib.sha1(data).hexdigest()[:16] + ".json"), 'wb') as f:
+            f.write(data)
+    
+    async def generate_passage(self, passage_type=None, topic=None):
         if not passage_type:
-            passage_type = random.choice(self.passage_types)
+            passage_type = self._rng.choice(self.passage_types)
         
         if not topic:
-            topic = random.choice(self.topics)
-        
-        # Determine number of passages based on passage type
-        num_passages = 2 if passage_type == "Double passage" else 1
+            topic = self._rng.choice(self.topics)
         
         # Determine number of questions
-        num_questions = 5 if passage_type == "Double passage" else random.randint(2, 4)
-        
-        prompt = f"""
-        Generate a TOEIC Part 7 practice {passage_type} on the topic of {topic}.
-        
-        {"For the double passage, create two related passages that complement each other." if passage_type == "Double passage" else "Create a single comprehensive passage."}
-        
-        The passage(s) should be of appropriate length for TOEIC Part 7 (approximately 300-500 words total).
-        Include {num_questions} reading comprehension questions with four options (A, B, C, D) for each question.
-        
-        Make sure to include a mix of these question types:
-        - Main idea questions (What is the passage mainly about?)
-        - Detail questions (According to the passage, what...?)
-        - Inference questions (What can be inferred about...?)
-        - Vocabulary questions (The word "X" in paragraph Y is closest in meaning to...)
-        
-        Only ONE option should be correct for each question. Include an explanation of why the correct answer is right and why the others are wrong.
-        
-        Format the response as a JSON object with these fields:
-        - passage_title: A title for the passage or passages
-        - passage_text: {"An array of two passages" if passage_type == "Double passage" else "The full text of the passage"}
-        - questions: An array of {num_questions} objects, each containing:
-          - question_number: The number of the question
-          - question_text: The text of the question
-          - question_type: The type of question (Main idea, Detail, Inference, or Vocabulary)
-          - options: An array of 4 options (A, B, C, D)
-          - correct_answer: The letter of the correct option (A, B, C, or D)
-          - explanation: A detailed explanation of the correct answer
-        - passage_type: The type of passage (Single passage or Double passage)
-        - topic: The topic of the passage
-        
-        The difficulty should be appropriate for TOEIC test takers (intermediate to advanced English).
+        num_questions = self._num_questions(passage_type)
+        
+        prompt = self._build_prompt(passage_type, topic, num_questions)
+        cache_bucket = self._cache_bucket(passage_type, topic, prompt)
+        cached = self._get_cached_passage(cache_bucket)
+        if cached:
+            return cached
+        
+        try:
+            response = await self.client.chat.completions.create(
+                model=_MODEL,
+                messages=_messages(prompt),
+                response_format=_PASSAGE_FORMAT
+            )
+            result = _decode(response.choices[0].message.content, _PASSAGE_DECODER)
+            self._cache_passage(cache_bucket, result)
+            return result
+        except Exception as e:
+            print(f"Error generating passage: {e}")
+            return None
+    
+    async def stream_passage(self, passage_type, topic=None):
+        """Generate a passage, printing its text as it arrives.
+        
+        The text is streamed as plain text first and the questions are written
+        in a second request while the user reads. Returns the passage and
+        whether it has already been displayed.
         """
+        if not topic:
+            topic = self._rng.choice(self.topics)
+        
+        num_questions = self._num_questions(passage_type)
+        cache_bucket = self._cache_bucket(passage_type, topic, self._build_prompt(passage_type, topic, num_questions))
+        cached = self._get_cached_passage(cache_bucket)
+        if cached:
+            return cached, False
+        
+        is_double = passage_type == "Double passage"
+        text_prompt = (
+            f"Write the text of a {passage_type} on the topic of {topic}. Reply with plain text only: "
+            "a title on its own line, a blank line, then the passage."
+        )
+        if is_double:
+            text_prompt += " Separate the two texts with a line containing only ---."
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}]
+            stream = await self.client.chat.completions.create(
+                model=_MODEL,
+                messages=_messages(text_prompt),
+                stream=True
             )
             
-            # Parse the response content as JSON
+            print("\n" + "=" * 80)
+            print(f"Topic: {topic} | Type: {passage_type}\n")
+            
+            # Show the text as it arrives, collecting chunks to join once at the end
+            chunks = []
+            add_chunk = chunks.append
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    add_chunk(delta)
+                    print(delta, end="", flush=True)
+            print("\n\n" + "=" * 80)
+            
+            title, _, text = "".join(chunks).strip().partition("\n")
+            text = text.strip()
+            if is_double:
+                passage_text = [part.strip() for part in _PASSAGE_SEPARATOR.split(text, maxsplit=1)]
+                if len(passage_text) != 2:
+                    raise ValueError("the double passage was not split into two texts")
+            else:
+                passage_text = text
+            
+            questions_prompt = (
+                f"Write {num_questions} questions for this {passage_type} on the topic of {topic}, "
+                f"as a JSON object with a single field \"questions\":\n\n{text}"
+            )
+            response = await self.client.chat.completions.create(
+                model=_MODEL,
+                messages=_messages(questions_prompt),
+                response_format=_QUESTIONS_FORMAT
+            )
+            questions = _decode(response.choices[0].message.content, _QUESTION_SET_DECODER)['questions']
+        except Exception as e:
+            print(f"\nError generating passage: {e}")
+            return None, False
+        
+        passage = {
+            "passage_title": title.strip("#* "),
+            "passage_text": passage_text,
+            "questions": questions,
+            "passage_type": passage_type,
+            "topic": topic
+        }
+        self._cache_passage(cache_bucket, passage)
+        return passage, True
+    
+    async def generate_passages(self, passage_types, topic=None):
+        """Generate one passage per type with a single API request.
+        
+        Passages the response doesn't include are returned as None.
+        """
+        passages = [None] * len(passage_types)
+        specs = []
+        # Draw all the topics at once rather than one call per passage
+        passage_topics = [topic] * len(passage_types) if topic else self._rng.choices(self.topics, k=len(passage_types))
+        for i, (passage_type, passage_topic) in enumerate(zip(passage_types, passage_topics)):
+            num_questions = self._num_questions(passage_type)
+            cache_bucket = self._cache_bucket(passage_type, passage_topic, self._build_prompt(passage_type, passage_topic, num_questions))
+            passages[i] = self._get_cached_passage(cache_bucket)
+            if not passages[i]:
+                specs.append((i, passage_type, passage_topic, num_questions, cache_bucket))
+        
+        if not specs:
+            return passages
+        
+        spec_lines = "\n".join(
+            f"{n}. A {passage_type} on the topic of {passage_topic}, with {num_questions} questions"
+            for n, (_, passage_type, passage_topic, num_questions, _) in enumerate(specs, 1)
+        )
+        
+        prompt = (
+            f"Generate {len(specs)} independent passages, as a JSON object with a single field \"passages\" "
+            f"listing them in this order:\n{spec_lines}"
+        )
+        
+        try:
+            response = await self.client.chat.completions.create(
+                model=_MODEL,
+                messages=_messages(prompt),
+                response_format=_PASSAGES_FORMAT
+            )
+            results = _decode(response.choices[0].message.content, _PASSAGE_BATCH_DECODER)['passages']
+        except Exception as e:
+            # Passages missing from the batch are generated one by one later
+            print(f"Error generating passages: {e}")
+            return passages
+        
+        for (i, _, _, _, cache_bucket), result in zip(specs, results):
+            passages[i] = result
+            self._cache_passage(cache_bucket, result)
+        
+        return passages
+    
+    def _load_pending_batches(self):
+        if os.path.exists(self.batches_file):
             try:
-                result = json.loads(response.choices[0].message.content)
-                return result
+                with open(self.batches_file, 'rb') as f:
+                    return _json_loads(f.read())
             except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract information manually
-                content = response.choices[0].message.content
-                print("Warning: Could not parse response as JSON. Using fallback method.")
-                
-                # Create a basic structure for the result
-                fallback_result = {
-                    "passage_title": "Sample Passage",
-                    "passage_text": ["Could not parse the passage properly. Please try again."] if passage_type == "Double passage" else "Could not parse the passage properly. Please try again.",
-                    "questions": [
-                        {
-                            "question_number": i+1,
-                            "question_text": f"Question {i+1}",
-                            "question_type": random.choice(self.question_types),
-                            "options": ["Option A", "Option B", "Option C", "Option D"],
-                            "correct_answer": "A",
-                            "explanation": "Please try again."
-                        } for i in range(num_questions)
-                    ],
-                    "passage_type": passage_type,
-                    "topic": topic
-                }
-                
-                return fallback_result
+                return []
+        return []
+    
+    def _save_pending_batches(self, batches):
+        with open(self.batches_file, 'wb') as f:
+            f.write(_json_dumps(batches))
+    
+    async def prefill_cache(self, per_bucket=20):
+        """Submit a Batch API job generating passages for every type and topic.
+        
+        Batch jobs are cheaper than regular requests but may take up to a day;
+        finished results are moved into the cache by drain_batches.
+        """
+        lines = []
+        buckets = {}
+        for passage_type in self.passage_types:
+            for topic in self.topics:
+                for i in range(per_bucket):
+                    prompt = self._build_prompt(passage_type, topic, self._num_questions(passage_type))
+                    custom_id = f"{passage_type}|{topic}|{i}"
+                    buckets[custom_id] = self._cache_bucket(passage_type, topic, prompt)
+                    lines.append(_json_line({
+                        "custom_id": custom_id,
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": _MODEL,
+                            "messages": _messages(prompt),
+                            "response_format": _PASSAGE_FORMAT
+                        }
+                    }))
+        
+        try:
+            input_file = await self.client.files.create(file=("part7_batch.jsonl", b"".join(lines)), purpose="batch")
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
         except Exception as e:
-            print(f"Error generating passage: {e}")
-            return None
+            print(f"Error submitting batch: {e}")
+            return
+        
+        # Remember where each result belongs until the batch is drained
+        pending = self._load_pending_batches()
+        pending.append({"id": batch.id, "buckets": buckets})
+        self._save_pending_batches(pending)
+        print(f"Submitted batch {batch.id} with {len(lines)} passages.")
+    
+    async def drain_batches(self):
+        """Move the results of finished batch jobs into the passage cache."""
+        pending = self._load_pending_batches()
+        if not pending:
+            print("No batch jobs pending.")
+            return
+        
+        still_pending = []
+        for entry in pending:
+            try:
+                batch = await self.client.batches.retrieve(entry['id'])
+            except Exception as e:
+                print(f"Error checking batch {entry['id']}: {e}")
+                still_pending.append(entry)
+                continue
+            
+            if batch.status in ("failed", "expired", "cancelled"):
+                print(f"Batch {batch.id} {batch.status}; discarding it.")
+                continue
+            if batch.status != "completed":
+                print(f"Batch {batch.id} is still {batch.status}.")
+                still_pending.append(entry)
+                continue
+            
+            try:
+                output = await self.client.files.content(batch.output_file_id)
+            except Exception as e:
+                print(f"Error downloading batch {batch.id}: {e}")
+                still_pending.append(entry)
+                continue
+            
+            cached = 0
+            for line in output.content.splitlines():
+                if not line.strip():
+                    continue
+                result = _json_loads(line)
+                response = result.get('response') or {}
+                cache_bucket = entry['buckets'].get(result.get('custom_id'))
+                if response.get('status_code') != 200 or not cache_bucket:
+                    continue
+                try:
+                    passage = _decode(response['body']['choices'][0]['message']['content'], _PASSAGE_DECODER)
+                except (KeyError, IndexError, ValueError):
+                    continue
+                self._cache_passage(cache_bucket, passage)
+                cached += 1
+            print(f"Batch {batch.id}: cached {cached} passages.")
+        
+        self._save_pending_batches(still_pending)
     
     def display_passage(self, passage):
         print("\n" + "=" * 80)
@@ -171,7 +660,7 @@ class TOEICPractice:
         print(f"\nQuestion {question['question_number']} ({question['question_type']}):")
         print(question['question_text'])
         print("Options:")
-        for i, option in enumerate(['A', 'B', 'C', 'D']):
+        for i, option in enumerate(OPTION_LETTERS):
             print(f"{option}. {question['options'][i]}")
     
     def practice_session(self, num_passages=2, passage_type=None, topic=None):
@@ -185,12 +674,29 @@ class TOEICPractice:
             "total": 0  # Will be updated as we go
         }
         
+        # For each passage, randomly choose passage type if not specified
+        passage_types = [passage_type] * num_passages if passage_type else self._rng.choices(self.passage_types, k=num_passages)
+        
+        # Stream the first passage so the user can start reading right away, and
+        # request the rest with one batch that completes while the user answers
+        first_future = self._submit(self.stream_passage(passage_types[0], topic))
+        futures = [first_future]
+        if num_passages > 1:
+            remaining_future = self._submit(self.generate_passages(passage_types[1:], topic))
+            futures.append(remaining_future)
+        
+        # Stays None if a passage has no questions, so it is simply skipped
+        user_answer = None
         for i in range(num_passages):
-            # For each iteration, randomly choose passage type if not specified
-            current_passage_type = passage_type if passage_type else random.choice(self.passage_types)
-            
-            print(f"\nGenerating {current_passage_type} {i+1}/{num_passages}...")
-            passage = self.generate_passage(current_passage_type, topic)
+            future = first_future if i == 0 else remaining_future
+            if not future.done():
+                print(f"\nGenerating {passage_types[i]} {i+1}/{num_passages}...")
+            if i == 0:
+                passage, displayed = first_future.result()
+            else:
+                passage, displayed = remaining_future.result()[i - 1], False
+            if not passage:
+                passage = self._submit(self.generate_passage(passage_types[i], topic)).result()
             
             if not passage:
                 print("Failed to generate passage. Skipping...")
@@ -206,7 +712,8 @@ class TOEICPractice:
             # Update total questions count
             session['total'] += len(passage['questions'])
             
-            self.display_passage(passage)
+            if not displayed:
+                self.display_passage(passage)
             
             for question in passage['questions']:
                 self.display_question(question)
@@ -214,7 +721,7 @@ class TOEICPractice:
                 # Get user answer
                 while True:
                     user_answer = input("\nYour answer (A/B/C/D or 'q' to quit): ").upper()
-                    if user_answer in ['A', 'B', 'C', 'D', 'Q']:
+                    if user_answer in VALID_ANSWERS:
                         break
                     print("Invalid input. Please enter A, B, C, D, or Q.")
                 
@@ -245,22 +752,24 @@ class TOEICPractice:
                 if user_answer == 'Q':
                     break
             
+            # Add passage result to session, keeping answers given before quitting
+            if passage_result['questions']:
+                session['passages'].append(passage_result)
+            
             # If user quit during questions, break out of passages loop
             if user_answer == 'Q':
                 break
-                
-            # Add passage result to session
-            session['passages'].append(passage_result)
             
             # Pause between passages
             if i < num_passages - 1:
                 input("\nPress Enter for the next passage...")
         
+        # Drop passages the user quit before reaching
+        for future in futures:
+            future.cancel()
+        
         # Update history
-        self.history['sessions'].append(session)
-        self.history['total_correct'] += session['correct']
-        self.history['total_questions'] += sum(len(p['questions']) for p in session['passages'])
-        self.save_history()
+        self.save_history(session)
         
         # Show session summary
         total_questions = sum(len(p['questions']) for p in session['passages'])
@@ -276,14 +785,15 @@ class TOEICPractice:
         print("TOEIC Part 7 Practice Statistics")
         print("=" * 80)
         
-        if not self.history['sessions']:
+        total_sessions, total_correct = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(correct), 0) FROM sessions"
+        ).fetchone()
+        if not total_sessions:
             print("No practice sessions recorded yet.")
             return
         
         # Overall stats
-        total_sessions = len(self.history['sessions'])
-        total_correct = self.history['total_correct']
-        total_questions = self.history['total_questions']
+        total_questions = self.db.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
         
         if total_questions > 0:
             overall_accuracy = (total_correct / total_questions) * 100
@@ -292,55 +802,36 @@ class TOEICPractice:
         print(f"Total Sessions: {total_sessions}")
         
         # Stats by question type
-        question_type_stats = {}
-        for session in self.history['sessions']:
-            for passage in session['passages']:
-                for question in passage['questions']:
-                    q_type = question['question_type']
-                    if q_type not in question_type_stats:
-                        question_type_stats[q_type] = {'correct': 0, 'total': 0}
-                    
-                    question_type_stats[q_type]['total'] += 1
-                    if question['is_correct']:
-                        question_type_stats[q_type]['correct'] += 1
-        
         print("\nPerformance by Question Type:")
-        for q_type, stats in question_type_stats.items():
-            if stats['total'] > 0:
-                accuracy = (stats['correct'] / stats['total']) * 100
-                print(f"{q_type}: {accuracy:.1f}% ({stats['correct']}/{stats['total']})")
+        for q_type, correct, total in self.db.execute(
+            "SELECT question_type, SUM(is_correct), COUNT(*) FROM questions GROUP BY question_type"
+        ):
+            accuracy = (correct / total) * 100
+            print(f"{q_type}: {accuracy:.1f}% ({correct}/{total})")
         
         # Stats by passage type
-        passage_type_stats = {}
-        for session in self.history['sessions']:
-            for passage in session['passages']:
-                p_type = passage['passage_type']
-                if p_type not in passage_type_stats:
-                    passage_type_stats[p_type] = {'correct': 0, 'total': 0}
-                
-                for question in passage['questions']:
-                    passage_type_stats[p_type]['total'] += 1
-                    if question['is_correct']:
-                        passage_type_stats[p_type]['correct'] += 1
-        
         print("\nPerformance by Passage Type:")
-        for p_type, stats in passage_type_stats.items():
-            if stats['total'] > 0:
-                accuracy = (stats['correct'] / stats['total']) * 100
-                print(f"{p_type}: {accuracy:.1f}% ({stats['correct']}/{stats['total']})")
-        
-        # Recent sessions
+        for p_type, correct, total in self.db.execute(
+            "SELECT p.passage_type, SUM(q.is_correct), COUNT(*)"
+            " FROM questions q JOIN passages p ON p.id = q.passage_id GROUP BY p.passage_type"
+        ):
+            accuracy = (correct / total) * 100
+            print(f"{p_type}: {accuracy:.1f}% ({correct}/{total})")
+        
+        # Recent sessions, most recent first
         print("\nRecent Sessions:")
-        recent_sessions = self.history['sessions'][-5:] if len(self.history['sessions']) > 5 else self.history['sessions']
-        recent_sessions.reverse()  # Show most recent first
+        recent_sessions = self.db.execute(
+            "SELECT s.date, s.correct,"
+            " (SELECT COUNT(*) FROM questions q JOIN passages p ON p.id = q.passage_id WHERE p.session_id = s.id)"
+            " FROM sessions s ORDER BY s.id DESC LIMIT 5"
+        )
         
-        for i, session in enumerate(recent_sessions):
-            total_questions = sum(len(p['questions']) for p in session['passages'])
+        for i, (date, correct, total_questions) in enumerate(recent_sessions):
             if total_questions > 0:
-                accuracy = (session['correct'] / total_questions) * 100
-                print(f"{i+1}. {session['date']}: {session['correct']}/{total_questions} correct ({accuracy:.1f}%)")
+                accuracy = (correct / total_questions) * 100
+                print(f"{i+1}. {date}: {correct}/{total_questions} correct ({accuracy:.1f}%)")
             else:
-                print(f"{i+1}. {session['date']}: No questions answered")
+                print(f"{i+1}. {date}: No questions answered")
         
         print("=" * 80)
 
@@ -353,9 +844,11 @@ def main():
         print("=" * 80)
         print("1. Start a practice session")
         print("2. View statistics")
-        print("3. Exit")
+        print("3. Pre-generate passages with the Batch API")
+        print("4. Collect finished pre-generated passages")
+        print("5. Exit")
         
-        choice = input("\nEnter your choice (1-3): ")
+        choice = input("\nEnter your choice (1-5): ")
         
         if choice == '1':
             # Ask for number of passages
@@ -401,6 +894,24 @@ def main():
             practice.show_stats()
             
         elif choice == '3':
+            if not practice.client and not practice.setup_api():
+                continue
+            while True:
+                try:
+                    per_bucket = int(input("\nHow many passages per topic and passage type? (1-50, default: 20): ") or "20")
+                    if 1 <= per_bucket <= 50:
+                        break
+                    print("Please enter a number between 1 and 50.")
+                except ValueError:
+                    print("Please enter a valid number.")
+            practice._submit(practice.prefill_cache(per_bucket)).result()
+            
+        elif choice == '4':
+            if not practice.client and not practice.setup_api():
+                continue
+            practice._submit(practice.drain_batches()).result()
+            
+        elif choice == '5':
             print("\nThank you for practicing TOEIC Part 7! Goodbye.")
             break
             
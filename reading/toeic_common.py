@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Shared pieces of the TOEIC reading practice tools."""
+import os
+import re
+import json
+import atexit
+import random
+import threading
+from abc import ABC, abstractmethod
+
+# orjson is optional - will be used for faster JSON handling if available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# json5 is optional - will be used to read lenient JSON if available
+try:
+    import json5
+except ImportError:
+    json5 = None
+
+# Accepted answers at the prompt, and option letters in display order
+VALID_ANSWERS = frozenset("ABCDQ")
+OPTION_LETTERS = ('A', 'B', 'C', 'D')
+
+# Once a cache pool holds this many items, new requests may be served from it
+CACHE_POOL_SIZE = 5
+CACHE_REUSE_PROBABILITY = 0.5
+
+def _json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Set TOEIC_DEBUG_JSON=1 to write indented JSON for manual inspection
+_DEBUG_JSON = os.environ.get("TOEIC_DEBUG_JSON") == "1"
+
+def _json_dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if _DEBUG_JSON else None)
+    if _DEBUG_JSON:
+        return json.dumps(obj, indent=2).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+def _json_line(obj):
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8") + b"\n"
+
+# Outermost JSON object or array in a response wrapped in prose or code fences
+JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+JSON_ARRAY = re.compile(r"\[.*\]", re.DOTALL)
+
+def parse_json(content, adapter, pattern):
+    """Validate a model response, rescuing JSON wrapped in prose or code fences.
+    
+    Raises pydantic's ValidationError, a ValueError, when no valid document
+    can be recovered.
+    """
+    # Already loaded by the adapter, so importing it here costs nothing
+    from pydantic import ValidationError
+    
+    try:
+        return adapter.validate_json(content)
+    except ValidationError as error:
+        match = pattern.search(content)
+        if not match:
+            raise
+        block = match.group(0)
+        try:
+            return adapter.validate_json(block)
+        except ValidationError:
+            if json5 is None:
+                raise error
+        # json5 accepts trailing commas, single quotes and unquoted keys
+        try:
+            data = json5.loads(block)
+        except ValueError:
+            raise error
+        return adapter.validate_python(data)
+
+class BaseTOEICPractice(ABC):
+    """History, cache and API handling shared by the Part 5 and Part 6 tools."""
+    topics = []
+    history_file = None
+    legacy_history_file = None
+    cache_file = None
+    history_key = "sessions"
+    stats_title = "TOEIC Practice Statistics"
+    
+    def __init__(self):
+        self.api_key = None
+        self.client = None
+        self._pending_sessions = []
+        atexit.register(self._flush_pending)
+        # The cache is also updated by the thread that generates the rest of a
+        # session, so changes and saves are made while holding this lock
+        self._cache_lock = threading.Lock()
+        self.history = self.load_history()
+        self.cache = self.load_cache()
+    
+    @abstractmethod
+    def _count_questions(self, session):
+        """Return the number of questions answered in a stored session."""
+    
+    def load_history(self):
+        sessions = []
+        history = {self.history_key: sessions, "total_correct": 0, "total_questions": 0}
+        
+        if os.path.exists(self.history_file):
+            # One session per line, oldest first
+            add_session = sessions.append
+            with open(self.history_file, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        add_session(_json_loads(line))
+                    except json.JSONDecodeError:
+                        # Skip a line left incomplete by an interrupted write
+                        continue
+        elif os.path.exists(self.legacy_history_file):
+            # Migrate the old single-document history to the append-only file
+            try:
+                with open(self.legacy_history_file, 'rb') as f:
+                    sessions = history[self.history_key] = _json_loads(f.read()).get(self.history_key, [])
+            except json.JSONDecodeError:
+                pass
+            self.append_sessions(sessions)
+        
+        for session in sessions:
+            history['total_correct'] += session['correct']
+            history['total_questions'] += self._count_questions(session)
+        return history
+    
+    def append_sessions(self, sessions):
+        # Only new sessions are written; earlier lines are never rewritten
+        with open(self.history_file, 'ab') as f:
+            f.write(b"".join(_json_line(session) for session in sessions))
+    
+    def save_history(self, session):
+        # Buffered in memory and written in one batch when the program exits
+        self._pending_sessions.append(session)
+    
+    def _flush_pending(self):
+        if self._pending_sessions:
+            self.append_sessions(self._pending_sessions)
+            self._pending_sessions = []
+    
+    def load_cache(self):
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'rb') as f:
+                    return _json_loads(f.read())
+            except json.JSONDecodeError:
+                return {}
+        return {}
+    
+    def save_cache(self):
+        with self._cache_lock:
+            with open(self.cache_file, 'wb') as f:
+                f.write(_json_dumps(self.cache))
+    
+    def _get_cached(self, cache_key):
+        # Reuse a previously generated item once enough are cached
+        with self._cache_lock:
+            cached = self.cache.get(cache_key, [])
+            if len(cached) >= CACHE_POOL_SIZE and random.random() < CACHE_REUSE_PROBABILITY:
+                return random.choice(cached)
+        return None
+    
+    def _add_to_cache(self, cache_key, item):
+        with self._cache_lock:
+            self.cache.setdefault(cache_key, []).append(item)
+    
+    def setup_api(self):
+        # Imported here so that viewing statistics doesn't load the OpenAI client
+        import openai
+        
+        # Check if API key is already set in environment
+        self.api_key = os.environ.get("OPENAI_API_KEY")
+        
+        if not self.api_key:
+            from getpass import getpass
+            print("\nOpenAI API key not found in environment variables.")
+            self.api_key = getpass("Please enter your OpenAI API key: ")
+            # Ask if user wants to save the API key to environment
+            save_key = input("Would you like to save this API key for future sessions? (y/n): ").lower()
+            if save_key == 'y':
+                with open(os.path.expanduser("~/.bashrc"), "a") as f:
+                    f.write(f'\nexport OPENAI_API_KEY="{self.api_key}"\n')
+                print("API key saved to ~/.bashrc. Please restart your terminal or run 'source ~/.bashrc' to apply.")
+        
+        try:
+            self.client = openai.OpenAI(api_key=self.api_key)
+            print("API connection established successfully!")
+            return True
+        except Exception as e:
+            print(f"Error setting up OpenAI API: {e}")
+            return False
+    
+    def _complete(self, prompt, show_progress=True):
+        """Stream a chat completion and return the full response text."""
+        stream = self.client.chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
+        )
+        
+        # Collect chunks in a list and join once at the end
+        chunks = []
+        add_chunk = chunks.append
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                add_chunk(delta)
+                if show_progress and len(chunks) % 20 == 0:
+                    print(".", end="", flush=True)
+        if show_progress:
+            print()
+        
+        return "".join(chunks)
+    
+    def _get_valid_answer(self):
+        """Prompt until the user enters A, B, C, D or Q and return it."""
+        while True:
+            user_answer = input("\nYour answer (A/B/C/D or 'q' to quit): ").upper()
+            if user_answer in VALID_ANSWERS:
+                return user_answer
+            print("Invalid input. Please enter A, B, C, D, or Q.")
+    
+    def _topic_menu(self):
+        """Ask for a topic and return it, or None for a random mix."""
+        print("\nAvailable topics:")
+        for i, topic in enumerate(self.topics, 1):
+            print(f"{i}. {topic}")
+        print(f"{len(self.topics) + 1}. Random (mix of topics)")
+        
+        while True:
+            try:
+                topic_choice = int(input(f"\nChoose a topic (1-{len(self.topics) + 1}): "))
+                if 1 <= topic_choice <= len(self.topics) + 1:
+                    break
+                print(f"Please enter a number between 1 and {len(self.topics) + 1}.")
+            except ValueError:
+                print("Please enter a valid number.")
+        
+        return None if topic_choice == len(self.topics) + 1 else self.topics[topic_choice - 1]
+    
+    def _finish_session(self, session, total_answered):
+        # Update history
+        session['total'] = total_answered
+        self.history[self.history_key].append(session)
+        self.history['total_correct'] += session['correct']
+        self.history['total_questions'] += total_answered
+        self.save_history(session)
+        
+        # Show session summary
+        print("\n" + "=" * 80)
+        print(f"Session Summary: {session['correct']}/{total_answered} correct")
+        if total_answered > 0:
+            percentage = (session['correct'] / total_answered) * 100
+            print(f"Accuracy: {percentage:.1f}%")
+        print("=" * 80)
+    
+    def _show_breakdown(self):
+        """Print per-category performance below the overall statistics."""
+    
+    def _print_accuracy_table(self, title, stats):
+        if stats:
+            print(f"\n{title}:")
+            for name, (correct, total) in stats.items():
+                if total > 0:
+                    accuracy = (correct / total) * 100
+                    print(f"{name}: {correct}/{total} ({accuracy:.1f}%)")
+    
+    def show_stats(self):
+        print("\n" + "=" * 80)
+        print(self.stats_title)
+        print("=" * 80)
+        
+        sessions = self.history[self.history_key]
+        if not sessions:
+            print("No practice sessions recorded yet.")
+            return
+        
+        total_correct = self.history['total_correct']
+        total_questions = self.history['total_questions']
+        
+        print(f"Total Sessions: {len(sessions)}")
+        print(f"Total Questions Attempted: {total_questions}")
+        print(f"Total Correct Answers: {total_correct}")
+        
+        if total_questions > 0:
+            overall_accuracy = (total_correct / total_questions) * 100
+            print(f"Overall Accuracy: {overall_accuracy:.1f}%")
+        
+        self._show_breakdown()
+        
+        print("=" * 80)
@@ -2,63 +2,319 @@
 import os
 import json
 import random
-import time
+import asyncio
+import threading
+import itertools
+import httpx
 import openai
-import requests
 from getpass import getpass
 from datetime import datetime
+from collections import deque, defaultdict
 
-# PIL is optional - will be used if available
+# PIL is optional - will be used to open the generated images if available
 try:
     from PIL import Image
 except ImportError:
-    pass
+    Image = None
+
+# h2 is optional - lets concurrent requests share one HTTP/2 connection if available
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+# orjson is optional - will be used for faster JSON handling if available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode("utf-8")
+
+def _json_line(obj):
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8") + b"\n"
+
+# Fixed instructions shared by every request; only the short user message
+# changes, so the prompt prefix can be served from OpenAI's prompt cache
+_SYSTEM_PROMPT = """You write TOEIC Writing practice material (Questions 1-5, "Write a sentence based on a picture") for intermediate to advanced English learners, and you evaluate the sentences learners write.
+
+Scenes:
+- A scene describes a photograph taken at a given place, such as a store, park, office or train station.
+- The description should be vivid and include people, objects, and actions that would be visible in a photograph.
+- The scene should be suitable for a TOEIC Writing test where students need to write a sentence about the image.
+- Describe a scene with these fields:
+  - scene_title: A brief title for the scene
+  - scene_description: A detailed description of what would be visible in the photograph (150-200 words)
+  - scene_type: The type of scene (the place it was requested for)
+  - suggested_sentence: An example of a good sentence that describes the scene
+
+Word pairs:
+- A word pair is two common English words of the requested word types that could be used to describe a scene.
+- If providing a noun, use the singular form.
+- If providing a verb, use the base form.
+- Describe a word pair with these fields:
+  - word1: The first word
+  - word1_type: The type of the first word, as requested
+  - word2: The second word
+  - word2_type: The type of the second word, as requested
+  - example_usage: A brief example of how these words might be used in a sentence
+
+Exercises:
+- An exercise combines a scene and a word pair meant to be used together; it has all the fields of both.
+- When asked for several exercises, return them in the order they were requested.
+
+Evaluations:
+- Evaluate a learner's sentence based on:
+  1. Grammar and structure
+  2. Correct usage of the provided words
+  3. Relevance to the scene
+  4. Overall clarity and effectiveness
+- Provide specific suggestions for improvement and an improved version of the sentence.
+- Describe an evaluation with these fields:
+  - grammar_score: A score from 1-5 for grammar correctness
+  - word_usage_score: A score from 1-5 for correct usage of the provided words
+  - relevance_score: A score from 1-5 for relevance to the scene
+  - overall_score: An overall score from 1-5
+  - feedback: Specific feedback on the sentence
+  - improved_sentence: An improved version of the sentence
+  - explanation: An explanation of the improvements made
+
+Example evaluation, for the words "bench" and "under" in a park scene where a man reads beneath a large oak tree:
+- Sentence: "A man sitting on bench under the tree."
+- grammar_score 2: the sentence has no main verb and "bench" needs an article.
+- word_usage_score 4: both words are used with the right meaning.
+- relevance_score 5: the sentence describes what is visible.
+- overall_score 3
+- improved_sentence: "A man is sitting on a bench under a large tree."
+"""
+
+def _messages(prompt):
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+# Model used for the text generations; images come from DALL-E
+_MODEL = "gpt-4o-mini"
+
+_SCORE_SCHEMA = {"type": "integer", "enum": [1, 2, 3, 4, 5]}
+
+_SCENE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "scene_title": {"type": "string"},
+        "scene_description": {"type": "string"},
+        "scene_type": {"type": "string"},
+        "suggested_sentence": {"type": "string"}
+    },
+    "required": ["scene_title", "scene_description", "scene_type", "suggested_sentence"],
+    "additionalProperties": False
+}
+
+_WORD_PAIR_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "word1": {"type": "string"},
+        "word1_type": {"type": "string"},
+        "word2": {"type": "string"},
+        "word2_type": {"type": "string"},
+        "example_usage": {"type": "string"}
+    },
+    "required": ["word1", "word1_type", "word2", "word2_type", "example_usage"],
+    "additionalProperties": False
+}
+
+_EXERCISE_SCHEMA = {
+    "type": "object",
+    "properties": {**_SCENE_SCHEMA["properties"], **_WORD_PAIR_SCHEMA["properties"]},
+    "required": _SCENE_SCHEMA["required"] + _WORD_PAIR_SCHEMA["required"],
+    "additionalProperties": False
+}
+
+_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "grammar_score": _SCORE_SCHEMA,
+        "word_usage_score": _SCORE_SCHEMA,
+        "relevance_score": _SCORE_SCHEMA,
+        "overall_score": _SCORE_SCHEMA,
+        "feedback": {"type": "string"},
+        "improved_sentence": {"type": "string"},
+        "explanation": {"type": "string"}
+    },
+    "required": [
+        "grammar_score", "word_usage_score", "relevance_score", "overall_score",
+        "feedback", "improved_sentence", "explanation"
+    ],
+    "additionalProperties": False
+}
+
+# Structured outputs guarantee that responses parse and match these schemas
+_SCENE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "toeic_writing_scene", "strict": True, "schema": _SCENE_SCHEMA}
+}
+
+_WORD_PAIR_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "toeic_writing_word_pair", "strict": True, "schema": _WORD_PAIR_SCHEMA}
+}
+
+_EVALUATION_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "toeic_writing_evaluation", "strict": True, "schema": _EVALUATION_SCHEMA}
+}
+
+_EXERCISES_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "toeic_writing_exercises",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"exercises": {"type": "array", "items": _EXERCISE_SCHEMA}},
+            "required": ["exercises"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# Scenes and word types the exercises are drawn from
+SCENES = (
+    "Store",
+    "Park",
+    "Office",
+    "Bank",
+    "Restaurant",
+    "Airport",
+    "Library",
+    "School",
+    "Hospital",
+    "Train station"
+)
+
+WORD_TYPES = (
+    "Noun",
+    "Preposition",
+    "Verb",
+    "Coordinating conjunction",
+    "Adjective",
+    "Subordinating conjunction",
+    "Adverb"
+)
+
+# File name fragment for each scene's images
+SCENE_SLUGS = {scene: scene.lower().replace(' ', '_') for scene in SCENES}
+
+# Numbers the images of this run, so their file names never collide
+_image_numbers = itertools.count(1)
+
+# Up to CACHE_CAPACITY variants are kept per scene or word-type pair; once
+# CACHE_POOL_SIZE are cached, new requests may be served from them
+CACHE_CAPACITY = 8
+CACHE_POOL_SIZE = 3
+CACHE_REUSE_PROBABILITY = 0.5
+
+# Number of exercises prepared ahead of the one the user is working on
+PREFETCH_DEPTH = 2
 
 class TOEICWritingPractice:
     def __init__(self):
         self.api_key = None
         self.client = None
-        self.scenes = [
-            "Store",
-            "Park",
-            "Office",
-            "Bank",
-            "Restaurant",
-            "Airport",
-            "Library",
-            "School",
-            "Hospital",
-            "Train station"
-        ]
-        self.word_types = [
-            "Noun",
-            "Preposition",
-            "Verb",
-            "Coordinating conjunction",
-            "Adjective",
-            "Subordinating conjunction",
-            "Adverb"
-        ]
-        self.history_file = "part1_5_history.json"
+        self._http = None
+        self._loop = None
+        self._image_downloads = {}
+        self.history_file = "part1_5_history.jsonl"
+        self.legacy_history_file = "part1_5_history.json"
+        self.cache_file = "part1_5_cache.json"
+        self.batches_file = "part1_5_batches.json"
+        self.prepared_file = "part1_5_prepared.json"
         self.images_dir = "toeic_images"
         self.history = self.load_history()
+        self.cache = self.load_cache()
         
         # Create images directory if it doesn't exist
-        if not os.path.exists(self.images_dir):
-            os.makedirs(self.images_dir)
+        os.makedirs(self.images_dir, exist_ok=True)
         
     def load_history(self):
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return {"sessions": [], "total_exercises": 0}
-        return {"sessions": [], "total_exercises": 0}
+        sessions = []
+        
+        try:
+            # One session per line, oldest first
+            add_session = sessions.append
+            with open(self.history_file, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        add_session(_json_loads(line))
+                    except json.JSONDecodeError:
+                        # Skip a line left incomplete by an interrupted write
+                        continue
+        except FileNotFoundError:
+            sessions = self._migrate_legacy_history()
+        
+        total_exercises = sum(len(session['exercises']) for session in sessions)
+        return {"sessions": sessions, "total_exercises": total_exercises}
+    
+    def _migrate_legacy_history(self):
+        # Move the old single-document history to the append-only file
+        try:
+            with open(self.legacy_history_file, 'rb') as f:
+                sessions = _json_loads(f.read()).get('sessions', [])
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+        with open(self.history_file, 'ab') as f:
+            f.write(b"".join(_json_line(session) for session in sessions))
+        return sessions
+    
+    def save_history(self, session):
+        # Only the new session is written; earlier lines are never rewritten
+        with open(self.history_file, 'ab') as f:
+            f.write(_json_line(session))
+    
+    def load_cache(self):
+        cache = {"scenes": {}, "word_pairs": {}}
+        try:
+            with open(self.cache_file, 'rb') as f:
+                data = _json_loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cache
+        for section, entries in cache.items():
+            for key, items in data.get(section, {}).items():
+                entries[key] = deque(items, maxlen=CACHE_CAPACITY)
+        return cache
+    
+    def save_cache(self):
+        data = {section: {key: list(items) for key, items in entries.items()} for section, entries in self.cache.items()}
+        with open(self.cache_file, 'wb') as f:
+            f.write(_json_dumps(data))
+    
+    def _get_cached(self, section, key):
+        # Reuse a previously generated item once enough variants are cached
+        cached = self.cache[section].get(key)
+        if cached and len(cached) >= CACHE_POOL_SIZE and random.random() < CACHE_REUSE_PROBABILITY:
+            return dict(random.choice(cached))
+        return None
     
-    def save_history(self):
-        with open(self.history_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
+    def _add_to_cache(self, section, key, item):
+        # Copied so that adding the image path later doesn't change the cache
+        self.cache[section].setdefault(key, deque(maxlen=CACHE_CAPACITY)).append(dict(item))
+    
+    def _word_pair_key(self, word_types):
+        # The same two word types share a pool whatever their order
+        return "|".join(sorted(word_types))
     
     def setup_api(self):
         # Check if API key is already set in environment
@@ -75,75 +331,91 @@ class TOEICWritingPractice:
                 print("API key saved to ~/.bashrc. Please restart your terminal or run 'source ~/.bashrc' to apply.")
         
         try:
-            self.client = openai.OpenAI(api_key=self.api_key)
+            # One connection pool, kept alive between requests, serves both the
+            # API calls and the image downloads
+            self._http = openai.DefaultAsyncHttpxClient(
+                http2=h2 is not None,
+                timeout=60,
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=8)
+            )
+            self.client = openai.AsyncOpenAI(api_key=self.api_key, http_client=self._http)
+            self._start_event_loop()
             print("API connection established successfully!")
             return True
         except Exception as e:
             print(f"Error setting up OpenAI API: {e}")
             return False
     
-    def generate_image_description(self, scene=None):
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Close the shared HTTP client and stop the background event loop."""
+        if self._loop is None:
+            return
+        if self._http is not None:
+            self._submit(self._http.aclose()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+    
+    def _start_event_loop(self):
+        # API calls run on a background event loop so independent requests can
+        # overlap while the main thread keeps reading the user's input
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+    
+    def _submit(self, coro):
+        """Schedule a coroutine on the background loop and return its future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    async def generate_image_description(self, scene=None):
         if not scene:
-            scene = random.choice(self.scenes)
-        
-        prompt = f"""
-        Generate a detailed description of a scene in a {scene} for a TOEIC Writing practice exercise.
-        The description should be vivid and include people, objects, and actions that would be visible in a photograph.
-        The scene should be suitable for a TOEIC Writing test where students need to write a sentence about the image.
-        
-        Format the response as a JSON object with these fields:
-        - scene_title: A brief title for the scene
-        - scene_description: A detailed description of what would be visible in the photograph (150-200 words)
-        - scene_type: The type of scene (e.g., {scene})
-        - suggested_sentence: An example of a good sentence that describes the scene
-        """
+            scene = random.choice(SCENES)
+        
+        cached = self._get_cached('scenes', scene)
+        if cached:
+            return cached
+        
+        prompt = f"Describe a scene in a {scene}, as a JSON object."
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}]
+            response = await self.client.chat.completions.create(
+                model=_MODEL,
+                messages=_messages(prompt),
+                response_format=_SCENE_FORMAT
             )
             
-            # Parse the response content as JSON
-            try:
-                result = json.loads(response.choices[0].message.content)
-                return result
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract information manually
-                content = response.choices[0].message.content
-                print("Warning: Could not parse response as JSON. Using fallback method.")
-                
-                # Create a basic structure for the result
-                fallback_result = {
-                    "scene_title": f"Scene at a {scene}",
-                    "scene_description": "Could not generate a proper scene description. Please try again.",
-                    "scene_type": scene,
-                    "suggested_sentence": "This is an example sentence about the scene."
-                }
-                
-                return fallback_result
+            result = _json_loads(response.choices[0].message.content)
+            self._add_to_cache('scenes', scene, result)
+            self.save_cache()
+            return result
         except Exception as e:
             print(f"Error generating scene description: {e}")
             return None
             
-    def generate_image(self, scene_description):
+    async def generate_image(self, scene_description):
         """
         Generate an image using OpenAI's DALL-E based on the scene description.
-        Returns the path to the saved image file.
+        Returns the path the image is being downloaded to; display_scene waits
+        for the download to finish.
         """
         # Create a simplified prompt for DALL-E that focuses on realism
         prompt = f"A realistic photograph of {scene_description['scene_title']}. The scene shows {scene_description['scene_description'][:200]}..."
         
         try:
-            # Generate timestamp for unique filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            image_filename = f"{timestamp}_{scene_description['scene_type'].lower().replace(' ', '_')}.png"
+            # Generate timestamp for unique filename; the microseconds order the
+            # images and the counter keeps ones started at the same time apart
+            timestamp = f"{datetime.now():%Y%m%d_%H%M%S_%f}_{next(_image_numbers)}"
+            scene_type = scene_description['scene_type']
+            scene_slug = SCENE_SLUGS.get(scene_type) or scene_type.lower().replace(' ', '_')
+            image_filename = f"{timestamp}_{scene_slug}.png"
             image_path = os.path.join(self.images_dir, image_filename)
             
-            print("Generating image... This may take a moment.")
-            
             # Call DALL-E API to generate the image
-            response = self.client.images.generate(
+            response = await self.client.images.generate(
                 model="dall-e-3",  # Using DALL-E 3 for more realistic images
                 prompt=prompt,
                 size="1024x1024",
@@ -154,13 +426,8 @@ class TOEICWritingPractice:
             # Get the image URL from the response
             image_url = response.data[0].url
             
-            # Download and save the image
-            import requests
-            image_data = requests.get(image_url).content
-            with open(image_path, 'wb') as f:
-                f.write(image_data)
-                
-            print(f"Image saved to {image_path}")
+            # Download and save the image in the background
+            self._image_downloads[image_path] = self._submit(self._download_image(image_url, image_path))
             return image_path
             
         except Exception as e:
@@ -168,108 +435,298 @@ class TOEICWritingPractice:
             print("Continuing without image...")
             return None
     
-    def generate_word_pair(self):
+    async def _download_image(self, url, path):
+        try:
+            # Written to disk chunk by chunk as it arrives instead of holding the
+            # whole image in memory
+            async with self._http.stream("GET", url) as response:
+                response.raise_for_status()
+                with open(path, 'wb') as f:
+                    async for chunk in response.aiter_bytes(65536):
+                        f.write(chunk)
+            return True
+        except Exception as e:
+            print(f"Error downloading image: {e}")
+            # Don't leave a partial image behind
+            if os.path.exists(path):
+                os.remove(path)
+            return False
+    
+    async def generate_word_pair(self):
         # Select two different word types
-        word_types = random.sample(self.word_types, 2)
-        
-        prompt = f"""
-        Generate a pair of words for a TOEIC Writing practice exercise.
-        The words should be:
-        1. A {word_types[0]}
-        2. A {word_types[1]}
-        
-        The words should be common English words that could be used to describe a scene in a {random.choice(self.scenes)}.
-        If providing a noun, use the singular form.
-        If providing a verb, use the base form.
-        
-        Format the response as a JSON object with these fields:
-        - word1: The first word
-        - word1_type: The type of the first word ({word_types[0]})
-        - word2: The second word
-        - word2_type: The type of the second word ({word_types[1]})
-        - example_usage: A brief example of how these words might be used in a sentence
-        """
+        word_types = random.sample(WORD_TYPES, 2)
+        cache_key = self._word_pair_key(word_types)
+        cached = self._get_cached('word_pairs', cache_key)
+        if cached:
+            return cached
+        
+        prompt = (
+            f"Give a word pair with a {word_types[0]} and a {word_types[1]} for a scene in a "
+            f"{random.choice(SCENES)}, as a JSON object."
+        )
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}]
+            response = await self.client.chat.completions.create(
+                model=_MODEL,
+                messages=_messages(prompt),
+                response_format=_WORD_PAIR_FORMAT
             )
             
-            # Parse the response content as JSON
-            try:
-                result = json.loads(response.choices[0].message.content)
-                return result
-            except json.JSONDecodeError:
-                # If JSON parsing fails, create a fallback
-                fallback_result = {
-                    "word1": "customer" if word_types[0] == "Noun" else "happy" if word_types[0] == "Adjective" else "quickly",
-                    "word1_type": word_types[0],
-                    "word2": "purchase" if word_types[1] == "Verb" else "in" if word_types[1] == "Preposition" else "store",
-                    "word2_type": word_types[1],
-                    "example_usage": "The customer made a purchase in the store."
-                }
-                
-                return fallback_result
+            result = _json_loads(response.choices[0].message.content)
+            self._add_to_cache('word_pairs', cache_key, result)
+            self.save_cache()
+            return result
         except Exception as e:
             print(f"Error generating word pair: {e}")
             return None
     
-    def evaluate_sentence(self, sentence, word1, word2, scene_description):
-        prompt = f"""
-        Evaluate the following sentence written for a TOEIC Writing practice exercise:
+    async def evaluate_sentence(self, sentence, word1, word2, scene_description):
+        prompt = (
+            f'Evaluate this sentence, which should use the words "{word1}" and "{word2}" correctly, as a JSON object.\n'
+            f'Sentence: "{sentence}"\n'
+            f"Scene: {scene_description}"
+        )
+        
+        try:
+            stream = await self.client.chat.completions.create(
+                model=_MODEL,
+                messages=_messages(prompt),
+                response_format=_EVALUATION_FORMAT,
+                stream=True
+            )
+            
+            # Show progress while the evaluation streams in, collecting chunks
+            # in a list and joining once at the end
+            print("Evaluating", end="", flush=True)
+            chunks = []
+            add_chunk = chunks.append
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    add_chunk(delta)
+                    if len(chunks) % 20 == 0:
+                        print(".", end="", flush=True)
+            print()
+            
+            return _json_loads("".join(chunks))
+        except Exception as e:
+            print(f"Error evaluating sentence: {e}")
+            return None
+    
+    async def generate_exercises_batch(self, scene_types):
+        """Generate the scene and word pair for several exercises in one request.
         
-        Sentence: "{sentence}"
+        Returns a (scene, word_pair) tuple per scene type, or None for any
+        exercise the response doesn't include.
+        """
+        exercises = [None] * len(scene_types)
+        specs = []
+        for i, scene in enumerate(scene_types):
+            word_types = random.sample(WORD_TYPES, 2)
+            word_pair_key = self._word_pair_key(word_types)
+            cached_scene = self._get_cached('scenes', scene)
+            cached_word_pair = self._get_cached('word_pairs', word_pair_key)
+            if cached_scene and cached_word_pair:
+                exercises[i] = (cached_scene, cached_word_pair)
+            else:
+                specs.append((i, scene, word_types, word_pair_key))
         
-        The sentence should use these two words correctly: "{word1}" and "{word2}"
+        if not specs:
+            return exercises
         
-        The sentence should describe this scene:
-        {scene_description}
+        prompt = self._build_exercises_prompt([(scene, word_types) for _, scene, word_types, _ in specs])
         
-        Please evaluate the sentence based on:
-        1. Grammar and structure
-        2. Correct usage of the provided words
-        3. Relevance to the scene
-        4. Overall clarity and effectiveness
+        try:
+            response = await self.client.chat.completions.create(
+                model=_MODEL,
+                messages=_messages(prompt),
+                response_format=_EXERCISES_FORMAT
+            )
+            results = _json_loads(response.choices[0].message.content)['exercises']
+        except Exception as e:
+            # Exercises missing from the batch are generated one by one later
+            print(f"Error generating exercises: {e}")
+            return exercises
         
-        Provide specific suggestions for improvement and an improved version of the sentence.
+        for (i, scene_type, _, word_pair_key), result in zip(specs, results):
+            scene = {key: result[key] for key in _SCENE_SCHEMA["required"]}
+            word_pair = {key: result[key] for key in _WORD_PAIR_SCHEMA["required"]}
+            exercises[i] = (scene, word_pair)
+            self._add_to_cache('scenes', scene_type, scene)
+            self._add_to_cache('word_pairs', word_pair_key, word_pair)
+        self.save_cache()
         
-        Format the response as a JSON object with these fields:
-        - grammar_score: A score from 1-5 for grammar correctness
-        - word_usage_score: A score from 1-5 for correct usage of the provided words
-        - relevance_score: A score from 1-5 for relevance to the scene
-        - overall_score: An overall score from 1-5
-        - feedback: Specific feedback on the sentence
-        - improved_sentence: An improved version of the sentence
-        - explanation: An explanation of the improvements made
+        return exercises
+    
+    def _build_exercises_prompt(self, specs):
+        """Build the request for one exercise per (scene, word_types) pair."""
+        spec_lines = "\n".join(
+            f"{n}. A scene in a {scene}, with a {word_types[0]} and a {word_types[1]}"
+            for n, (scene, word_types) in enumerate(specs, 1)
+        )
+        return f"Write {len(specs)} exercises, as a JSON object with an \"exercises\" array:\n{spec_lines}"
+    
+    def _load_json_list(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return _json_loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+    
+    def _save_json_list(self, path, items):
+        with open(path, 'wb') as f:
+            f.write(_json_dumps(items))
+    
+    async def bulk_prepare(self, num=100):
+        """Submit a Batch API job preparing exercises for later sessions.
+        
+        Batch jobs are cheaper than regular requests but may take up to a day;
+        finished results are stored for practice_session by collect_prepared.
         """
+        lines = []
+        scene_types = {}
+        for i in range(num):
+            # Spread the exercises evenly over the scenes
+            scene = SCENES[i % len(SCENES)]
+            custom_id = str(i)
+            scene_types[custom_id] = scene
+            lines.append(_json_line({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": _MODEL,
+                    "messages": _messages(self._build_exercises_prompt([(scene, random.sample(WORD_TYPES, 2))])),
+                    "response_format": _EXERCISES_FORMAT
+                }
+            }))
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}]
+            input_file = await self.client.files.create(file=("part1_5_batch.jsonl", b"".join(lines)), purpose="batch")
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
             )
+        except Exception as e:
+            print(f"Error submitting batch: {e}")
+            return
+        
+        # Remember which scene each request was for until the batch is collected
+        pending = self._load_json_list(self.batches_file)
+        pending.append({"id": batch.id, "scene_types": scene_types})
+        self._save_json_list(self.batches_file, pending)
+        print(f"Submitted batch {batch.id} with {len(lines)} exercises.")
+    
+    async def collect_prepared(self):
+        """Store the exercises of finished batch jobs for later sessions."""
+        pending = self._load_json_list(self.batches_file)
+        if not pending:
+            print("No batch jobs pending.")
+            return
+        
+        prepared = self._load_json_list(self.prepared_file)
+        still_pending = []
+        for entry in pending:
+            try:
+                batch = await self.client.batches.retrieve(entry['id'])
+            except Exception as e:
+                print(f"Error checking batch {entry['id']}: {e}")
+                still_pending.append(entry)
+                continue
+            
+            if batch.status in ("failed", "expired", "cancelled"):
+                print(f"Batch {batch.id} {batch.status}; discarding it.")
+                continue
+            if batch.status != "completed":
+                print(f"Batch {batch.id} is still {batch.status}.")
+                still_pending.append(entry)
+                continue
             
-            # Parse the response content as JSON
             try:
-                result = json.loads(response.choices[0].message.content)
-                return result
-            except json.JSONDecodeError:
-                # If JSON parsing fails, create a fallback
-                fallback_result = {
-                    "grammar_score": 3,
-                    "word_usage_score": 3,
-                    "relevance_score": 3,
-                    "overall_score": 3,
-                    "feedback": "Unable to provide detailed feedback. Please try again.",
-                    "improved_sentence": sentence,
-                    "explanation": "Unable to provide an explanation. Please try again."
-                }
-                
-                return fallback_result
-        except Exception as e:
-            print(f"Error evaluating sentence: {e}")
-            return None
+                output = await self.client.files.content(batch.output_file_id)
+            except Exception as e:
+                print(f"Error downloading batch {batch.id}: {e}")
+                still_pending.append(entry)
+                continue
+            
+            collected = 0
+            for line in output.content.splitlines():
+                if not line.strip():
+                    continue
+                result = _json_loads(line)
+                response = result.get('response') or {}
+                scene_type = entry['scene_types'].get(result.get('custom_id'))
+                if response.get('status_code') != 200 or not scene_type:
+                    continue
+                try:
+                    exercise = _json_loads(response['body']['choices'][0]['message']['content'])['exercises'][0]
+                except (KeyError, IndexError, TypeError, ValueError):
+                    continue
+                prepared.append({
+                    "scene_type": scene_type,
+                    "scene": {key: exercise[key] for key in _SCENE_SCHEMA["required"]},
+                    "word_pair": {key: exercise[key] for key in _WORD_PAIR_SCHEMA["required"]}
+                })
+                collected += 1
+            print(f"Batch {batch.id}: prepared {collected} exercises.")
+        
+        self._save_json_list(self.prepared_file, prepared)
+        self._save_json_list(self.batches_file, still_pending)
+    
+    def _match_prepared(self, scene_types):
+        """Return a different prepared exercise entry for each scene type, or None.
+        
+        Entries stay in the file until _use_prepared removes the ones shown,
+        so a session that ends early keeps the rest for later.
+        """
+        prepared = self._load_json_list(self.prepared_file)
+        entries = []
+        for scene_type in scene_types:
+            for i, entry in enumerate(prepared):
+                if entry['scene_type'] == scene_type:
+                    entries.append(prepared.pop(i))
+                    break
+            else:
+                entries.append(None)
+        return entries
+    
+    def _use_prepared(self, entry):
+        """Remove a prepared exercise from the file once it has been shown."""
+        prepared = self._load_json_list(self.prepared_file)
+        if entry in prepared:
+            prepared.remove(entry)
+            self._save_json_list(self.prepared_file, prepared)
+    
+    async def _prepare_exercise(self, scene_type, exercise=None, batch=None, index=0):
+        """Generate the scene, its image and the word pair for one exercise.
+        
+        When a prepared (scene, word_pair) exercise is given, or a batch future
+        whose result at index is one, only the image is generated here.
+        """
+        if exercise is None and batch is not None and index is not None:
+            exercise = (await asyncio.wrap_future(batch))[index]
+        if exercise:
+            scene, word_pair = exercise
+            image_path = await self.generate_image(scene)
+            if image_path:
+                scene['image_path'] = image_path
+            return scene, word_pair
+        
+        async def scene_with_image():
+            scene = await self.generate_image_description(scene_type)
+            if scene:
+                # Generate image for the scene
+                image_path = await self.generate_image(scene)
+                if image_path:
+                    scene['image_path'] = image_path
+            return scene
+        
+        # The word pair doesn't depend on the scene, so it is generated while
+        # the scene and its image are
+        return await asyncio.gather(scene_with_image(), self.generate_word_pair())
     
     def display_scene(self, scene):
         print("\n" + "=" * 80)
@@ -278,18 +735,25 @@ class TOEICWritingPractice:
         print("Scene Description:")
         print(scene['scene_description'])
         
+        # The description is shown while the image is still downloading
+        download = self._image_downloads.pop(scene.get('image_path'), None)
+        if download and not download.result():
+            print("Continuing without image...")
+            del scene['image_path']
+        
         # Check if the scene has an associated image path
         if 'image_path' in scene and scene['image_path']:
             print(f"\nImage generated and saved to: {scene['image_path']}")
             
             # Try to display the image if running in a compatible environment
-            try:
-                # Try to use PIL to display the image if available
-                from PIL import Image
-                print("\nAttempting to open the image...")
-                Image.open(scene['image_path']).show()
-            except (ImportError, Exception) as e:
+            if Image is None:
                 print(f"\nTo view the image, open the file at: {scene['image_path']}")
+            else:
+                try:
+                    print("\nAttempting to open the image...")
+                    Image.open(scene['image_path']).show()
+                except Exception:
+                    print(f"\nTo view the image, open the file at: {scene['image_path']}")
         
         print("\n" + "=" * 80)
     
@@ -326,24 +790,38 @@ class TOEICWritingPractice:
         total_score = 0
         completed_exercises = 0
         
+        # For each exercise, randomly choose scene type if not specified
+        scene_types = [scene_type if scene_type else random.choice(SCENES) for _ in range(num_exercises)]
+        
+        # Exercises prepared with the Batch API are used first. Otherwise the
+        # first exercise is generated on its own so it is ready sooner, and the
+        # scenes and word pairs for the rest come from one batched request
+        prepared = self._match_prepared(scene_types)
+        missing = [i for i in range(1, num_exercises) if not prepared[i]]
+        batch_index = {i: n for n, i in enumerate(missing)}
+        batch = self._submit(self.generate_exercises_batch([scene_types[i] for i in missing])) if missing else None
+        
+        def prepare(i):
+            # The scene is copied, since the image path is added to it
+            exercise = (dict(prepared[i]['scene']), prepared[i]['word_pair']) if prepared[i] else None
+            return self._submit(self._prepare_exercise(scene_types[i], exercise, batch, batch_index.get(i)))
+        
+        # Exercises are prepared in the background, PREFETCH_DEPTH ahead, while
+        # the user is still writing sentences for earlier ones
+        upcoming = deque(prepare(i) for i in range(min(PREFETCH_DEPTH, num_exercises)))
+        
         for i in range(num_exercises):
-            # For each iteration, randomly choose scene type if not specified
-            current_scene_type = scene_type if scene_type else random.choice(self.scenes)
+            exercise_future = upcoming.popleft()
+            if i + PREFETCH_DEPTH < num_exercises:
+                upcoming.append(prepare(i + PREFETCH_DEPTH))
             
-            print(f"\nGenerating exercise {i+1}/{num_exercises}...")
-            scene = self.generate_image_description(current_scene_type)
+            if not exercise_future.done():
+                print(f"\nGenerating exercise {i+1}/{num_exercises}... This may take a moment.")
+            scene, word_pair = exercise_future.result()
             
             if not scene:
                 print("Failed to generate scene. Skipping...")
                 continue
-                
-            # Generate image for the scene
-            print("Generating an image for this scene...")
-            image_path = self.generate_image(scene)
-            if image_path:
-                scene['image_path'] = image_path
-            
-            word_pair = self.generate_word_pair()
             
             if not word_pair:
                 print("Failed to generate word pair. Skipping...")
@@ -358,13 +836,18 @@ class TOEICWritingPractice:
                 "word2_type": word_pair['word2_type']
             }
             
+            self.display_scene(scene)
+            
             # Add image path to exercise result if available
             if 'image_path' in scene:
                 exercise_result['image_path'] = scene['image_path']
             
-            self.display_scene(scene)
             self.display_word_pair(word_pair)
             
+            # A prepared exercise is only used up once it has been shown
+            if prepared[i]:
+                self._use_prepared(prepared[i])
+            
             # Get user sentence
             user_sentence = input("\nYour sentence: ")
             
@@ -377,7 +860,9 @@ class TOEICWritingPractice:
                 continue
             
             # Evaluate the sentence
-            evaluation = self.evaluate_sentence(user_sentence, word_pair['word1'], word_pair['word2'], scene['scene_description'])
+            evaluation = self._submit(
+                self.evaluate_sentence(user_sentence, word_pair['word1'], word_pair['word2'], scene['scene_description'])
+            ).result()
             
             if not evaluation:
                 print("Failed to evaluate sentence. Skipping...")
@@ -401,10 +886,12 @@ class TOEICWritingPractice:
             # Update total score
             total_score += evaluation['overall_score']
             completed_exercises += 1
-            
-            # Pause between exercises
-            if i < num_exercises - 1:
-                input("\nPress Enter for the next exercise...")
+        
+        # Don't keep generating exercises the user will never see
+        for exercise_future in upcoming:
+            exercise_future.cancel()
+        if batch:
+            batch.cancel()
         
         # Calculate average score
         if completed_exercises > 0:
@@ -413,7 +900,7 @@ class TOEICWritingPractice:
         # Update history
         self.history['sessions'].append(session)
         self.history['total_exercises'] += completed_exercises
-        self.save_history()
+        self.save_history(session)
         
         # Show session summary
         print("\n" + "=" * 80)
@@ -435,55 +922,45 @@ class TOEICWritingPractice:
         total_sessions = len(self.history['sessions'])
         total_exercises = self.history['total_exercises']
         
+        # Overall, scene type and word type scores, gathered in a single pass
+        total_score = 0
+        scene_type_stats = defaultdict(lambda: [0, 0])
+        word_type_stats = defaultdict(lambda: [0, 0])
+        for session in self.history['sessions']:
+            for exercise in session['exercises']:
+                total_score += exercise['overall_score']
+                
+                scene_entry = scene_type_stats[exercise['scene_type']]
+                scene_entry[0] += exercise['overall_score']
+                scene_entry[1] += 1
+                
+                word_usage_score = exercise['word_usage_score']
+                for w_type in (exercise['word1_type'], exercise['word2_type']):
+                    word_entry = word_type_stats[w_type]
+                    word_entry[0] += word_usage_score
+                    word_entry[1] += 1
+        
         if total_exercises > 0:
             # Calculate overall average score
-            overall_score = sum(session['average_score'] * len(session['exercises']) for session in self.history['sessions']) / total_exercises
+            overall_score = total_score / total_exercises
             print(f"Overall Average Score: {overall_score:.1f}/5")
         
         print(f"Total Sessions: {total_sessions}")
         print(f"Total Exercises Completed: {total_exercises}")
         
-        # Stats by scene type
-        scene_type_stats = {}
-        for session in self.history['sessions']:
-            for exercise in session['exercises']:
-                s_type = exercise['scene_type']
-                if s_type not in scene_type_stats:
-                    scene_type_stats[s_type] = {'total_score': 0, 'count': 0}
-                
-                scene_type_stats[s_type]['total_score'] += exercise['overall_score']
-                scene_type_stats[s_type]['count'] += 1
-        
         print("\nPerformance by Scene Type:")
-        for s_type, stats in scene_type_stats.items():
-            if stats['count'] > 0:
-                avg_score = stats['total_score'] / stats['count']
-                print(f"{s_type}: {avg_score:.1f}/5 ({stats['count']} exercises)")
-        
-        # Stats by word types
-        word_type_stats = {}
-        for session in self.history['sessions']:
-            for exercise in session['exercises']:
-                word1_type = exercise['word1_type']
-                word2_type = exercise['word2_type']
-                
-                for w_type in [word1_type, word2_type]:
-                    if w_type not in word_type_stats:
-                        word_type_stats[w_type] = {'total_score': 0, 'count': 0}
-                    
-                    word_type_stats[w_type]['total_score'] += exercise['word_usage_score']
-                    word_type_stats[w_type]['count'] += 1
+        for s_type, (score, count) in scene_type_stats.items():
+            avg_score = score / count
+            print(f"{s_type}: {avg_score:.1f}/5 ({count} exercises)")
         
         print("\nPerformance by Word Type:")
-        for w_type, stats in word_type_stats.items():
-            if stats['count'] > 0:
-                avg_score = stats['total_score'] / stats['count']
-                print(f"{w_type}: {avg_score:.1f}/5 ({stats['count']} occurrences)")
+        for w_type, (score, count) in word_type_stats.items():
+            avg_score = score / count
+            print(f"{w_type}: {avg_score:.1f}/5 ({count} occurrences)")
         
-        # Recent sessions
+        # Recent sessions, most recent first
         print("\nRecent Sessions:")
-        recent_sessions = self.history['sessions'][-5:] if len(self.history['sessions']) > 5 else self.history['sessions']
-        recent_sessions.reverse()  # Show most recent first
+        recent_sessions = reversed(self.history['sessions'][-5:])
         
         for i, session in enumerate(recent_sessions):
             exercises_count = len(session['exercises'])
@@ -496,54 +973,74 @@ class TOEICWritingPractice:
 
 
 def main():
-    practice = TOEICWritingPractice()
-    
-    while True:
-        print("\n" + "=" * 80)
-        print("TOEIC Writing Practice (Questions 1-5)")
-        print("=" * 80)
-        print("1. Start a practice session")
-        print("2. View statistics")
-        print("3. Exit")
-        
-        choice = input("\nEnter your choice (1-3): ")
-        
-        if choice == '1':
-            # Ask for number of exercises
-            while True:
-                try:
-                    num_exercises = int(input("\nHow many exercises would you like to practice? (1-10, default: 5): ") or "5")
-                    if 1 <= num_exercises <= 10:
-                        break
-                    print("Please enter a number between 1 and 10.")
-                except ValueError:
-                    print("Please enter a valid number.")
-            
-            # Ask for scene type preference
-            print("\nScene type:")
-            print("1. Random (default)")
-            for i, scene in enumerate(practice.scenes):
-                print(f"{i+2}. {scene}")
-            
-            scene_choice = input(f"\nEnter your choice (1-{len(practice.scenes)+1}): ") or "1"
-            scene_type = None
-            if scene_choice != "1" and scene_choice.isdigit():
-                scene_idx = int(scene_choice) - 2
-                if 0 <= scene_idx < len(practice.scenes):
-                    scene_type = practice.scenes[scene_idx]
-            
-            # Start practice session
-            practice.practice_session(num_exercises, scene_type)
-            
-        elif choice == '2':
-            practice.show_stats()
-            
-        elif choice == '3':
-            print("\nThank you for practicing TOEIC Writing!")
-            break
-            
-        else:
-            print("\nInvalid choice. Please enter 1, 2, or 3.")
+    # Closing the practice tool releases its connections when the menu exits
+    with TOEICWritingPractice() as practice:
+        while True:
+            print("\n" + "=" * 80)
+            print("TOEIC Writing Practice (Questions 1-5)")
+            print("=" * 80)
+            print("1. Start a practice session")
+            print("2. View statistics")
+            print("3. Prepare exercises with the Batch API")
+            print("4. Collect finished prepared exercises")
+            print("5. Exit")
+            
+            choice = input("\nEnter your choice (1-5): ")
+            
+            if choice == '1':
+                # Ask for number of exercises
+                while True:
+                    try:
+                        num_exercises = int(input("\nHow many exercises would you like to practice? (1-10, default: 5): ") or "5")
+                        if 1 <= num_exercises <= 10:
+                            break
+                        print("Please enter a number between 1 and 10.")
+                    except ValueError:
+                        print("Please enter a valid number.")
+                
+                # Ask for scene type preference
+                print("\nScene type:")
+                print("1. Random (default)")
+                for i, scene in enumerate(SCENES):
+                    print(f"{i+2}. {scene}")
+                
+                scene_choice = input(f"\nEnter your choice (1-{len(SCENES)+1}): ") or "1"
+                scene_type = None
+                if scene_choice != "1" and scene_choice.isdigit():
+                    scene_idx = int(scene_choice) - 2
+                    if 0 <= scene_idx < len(SCENES):
+                        scene_type = SCENES[scene_idx]
+                
+                # Start practice session
+                practice.practice_session(num_exercises, scene_type)
+                
+            elif choice == '2':
+                practice.show_stats()
+                
+            elif choice == '3':
+                if not practice.client and not practice.setup_api():
+                    continue
+                while True:
+                    try:
+                        num = int(input("\nHow many exercises would you like to prepare? (1-500, default: 100): ") or "100")
+                        if 1 <= num <= 500:
+                            break
+                        print("Please enter a number between 1 and 500.")
+                    except ValueError:
+                        print("Please enter a valid number.")
+                practice._submit(practice.bulk_prepare(num)).result()
+                
+            elif choice == '4':
+                if not practice.client and not practice.setup_api():
+                    continue
+                practice._submit(practice.collect_prepared()).result()
+                
+            elif choice == '5':
+                print("\nThank you for practicing TOEIC Writing!")
+                break
+                
+            else:
+                print("\nInvalid choice. Please enter a number from 1 to 5.")
 
 
 if __name__ == "__main__":
@@ -1,16 +1,347 @@
 #!/usr/bin/env python3
 import os
+import re
+import sys
 import json
+import sqlite3
 import random
 import time
-import openai
-from getpass import getpass
+import asyncio
+import threading
 from datetime import datetime
+from collections import deque
+
+# h2 is optional - lets concurrent requests share one HTTP/2 connection if available
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+# orjson is optional - will be used for faster JSON handling if available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+# Start of the next "key": pair in a streamed JSON object
+_FIELD_START = re.compile(r'\s*[{,]\s*("(?:[^"\\]|\\.)*")\s*:\s*')
+_DECODER = json.JSONDecoder()
+
+# Fixed instructions shared by every request; only the short user message
+# changes, so the prompt prefix can be served from OpenAI's prompt cache
+_SYSTEM_PROMPT = """You write TOEIC Writing practice material (Questions 6-7, "Respond to a written request") for intermediate to advanced English learners, and you evaluate the email responses learners write.
+
+Email scenarios:
+- A scenario is a realistic business email that the test-taker has received and must answer.
+- The email should be related to the requested context and should give the test-taker a reason to perform each of the requested tasks.
+- Format a scenario as a JSON object with these fields:
+  - email_subject: A clear subject line for the email
+  - sender_name: The name of the person sending the email
+  - sender_position: The position or role of the sender
+  - recipient_name: The name of the intended recipient (the test-taker)
+  - recipient_position: The position or role of the recipient
+  - email_body: The full content of the email (150-200 words)
+  - context: The context of the email, as requested
+  - tasks: An array of the specific tasks the test-taker needs to address in their response, exactly as requested
+  - key_points: 3-5 key points that should be addressed in a good response
+  - sample_response: A sample good response to the email that addresses all the tasks
+- When asked for several scenarios, return them in the order they were requested.
+
+Evaluations:
+- Evaluate a learner's response based on:
+  1. Task Completion (whether all required tasks were addressed)
+  2. Organization (structure, coherence, use of connecting words)
+  3. Sentence Variety (use of different sentence types and structures)
+  4. Grammar (grammatical accuracy)
+  5. Vocabulary (appropriate word choice)
+- Provide specific feedback for improvement in each area and an overall assessment.
+- Format an evaluation as a JSON object with these fields:
+  - task_completion_score: A score from 1-5 for task completion
+  - task_completion_feedback: Specific feedback on task completion
+  - organization_score: A score from 1-5 for organization
+  - organization_feedback: Specific feedback on organization
+  - sentence_variety_score: A score from 1-5 for sentence variety
+  - sentence_variety_feedback: Specific feedback on sentence variety
+  - grammar_score: A score from 1-5 for grammar
+  - grammar_feedback: Specific feedback on grammar
+  - vocabulary_score: A score from 1-5 for vocabulary
+  - vocabulary_feedback: Specific feedback on vocabulary
+  - overall_score: An overall score from 1-5
+  - overall_feedback: General feedback and suggestions for improvement
+  - improved_response: A suggested improved response
+
+Example evaluation, for an email asking the test-taker to "Ask TWO questions" about a rescheduled team meeting:
+- Response: "Hi Ms. Lee, thank you for the update. What time is the meeting now? Best regards, Tom"
+- task_completion_score 2: only one of the two required questions was asked.
+- organization_score 3: the greeting and closing are appropriate, but the body is a single line.
+- grammar_score 5: there are no grammatical errors.
+- overall_score 3
+"""
+
+# Per-request instructions; everything else is in the system prompt
+_SCENARIO_PROMPT = "Generate an email scenario as a JSON object.\nContext: {context}\nTasks: {tasks}"
+_SCENARIOS_PROMPT = "Generate {count} email scenarios, as a JSON object with a \"scenarios\" array:\n{specs}"
+_SCENARIO_SPEC = "{number}. Context: {context}. Tasks: {tasks}"
+_EVALUATION_PROMPT = (
+    "Evaluate this response to the email below as a JSON object.\n"
+    "Original Email Subject: {subject}\n"
+    "Original Email Body: {body}\n"
+    "Required Tasks: {tasks}\n\n"
+    "Student Response:\n{response}"
+)
+
+def _messages(prompt):
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+# Structured outputs need a newer model than the original gpt-4
+_MODEL = "gpt-4o-mini"
+
+_SCORE_SCHEMA = {"type": "integer", "enum": [1, 2, 3, 4, 5]}
+
+_SCENARIO_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "email_subject": {"type": "string"},
+        "sender_name": {"type": "string"},
+        "sender_position": {"type": "string"},
+        "recipient_name": {"type": "string"},
+        "recipient_position": {"type": "string"},
+        "email_body": {"type": "string"},
+        "context": {"type": "string"},
+        "tasks": {"type": "array", "items": {"type": "string"}},
+        "key_points": {"type": "array", "items": {"type": "string"}},
+        "sample_response": {"type": "string"}
+    },
+    "required": [
+        "email_subject", "sender_name", "sender_position", "recipient_name", "recipient_position",
+        "email_body", "context", "tasks", "key_points", "sample_response"
+    ],
+    "additionalProperties": False
+}
+
+_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "task_completion_score": _SCORE_SCHEMA,
+        "task_completion_feedback": {"type": "string"},
+        "organization_score": _SCORE_SCHEMA,
+        "organization_feedback": {"type": "string"},
+        "sentence_variety_score": _SCORE_SCHEMA,
+        "sentence_variety_feedback": {"type": "string"},
+        "grammar_score": _SCORE_SCHEMA,
+        "grammar_feedback": {"type": "string"},
+        "vocabulary_score": _SCORE_SCHEMA,
+        "vocabulary_feedback": {"type": "string"},
+        "overall_score": _SCORE_SCHEMA,
+        "overall_feedback": {"type": "string"},
+        "improved_response": {"type": "string"}
+    },
+    "required": [
+        "task_completion_score", "task_completion_feedback", "organization_score", "organization_feedback",
+        "sentence_variety_score", "sentence_variety_feedback", "grammar_score", "grammar_feedback",
+        "vocabulary_score", "vocabulary_feedback", "overall_score", "overall_feedback", "improved_response"
+    ],
+    "additionalProperties": False
+}
+
+# Upper bounds on the generated tokens, with headroom over a typical scenario
+# (two ~200-word texts plus key points) and evaluation (six feedback fields plus
+# an improved response); a cut-off response would fail the schema
+SCENARIO_MAX_TOKENS = 1000
+EVALUATION_MAX_TOKENS = 1200
+
+# Scoring is kept close to deterministic so the same response gets the same marks
+EVALUATION_TEMPERATURE = 0.4
+
+# Structured outputs guarantee that responses parse and match these schemas;
+# fields are generated in schema order, which is also the display order
+_SCENARIO_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "toeic_email_scenario", "strict": True, "schema": _SCENARIO_SCHEMA}
+}
+
+_EVALUATION_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "toeic_email_evaluation", "strict": True, "schema": _EVALUATION_SCHEMA}
+}
+
+_SCENARIOS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "toeic_email_scenarios",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"scenarios": {"type": "array", "items": _SCENARIO_SCHEMA}},
+            "required": ["scenarios"],
+            "additionalProperties": False
+        }
+    }
+}
+
+class _JSONFieldStream:
+    """Parse the top-level fields of a JSON object while its text streams in."""
+    
+    def __init__(self):
+        self.text = ""
+        self.fields = {}
+        self._pos = 0
+    
+    def consume(self, delta):
+        """Add a chunk of text and return True if it completed any field."""
+        self.text += delta
+        text = self.text
+        completed = False
+        while True:
+            match = _FIELD_START.match(text, self._pos)
+            if not match:
+                break
+            try:
+                value, end = _DECODER.raw_decode(text, match.end())
+            except ValueError:
+                # The value hasn't fully arrived yet
+                break
+            # A number is only known to be complete once something follows it
+            if not text[end:].strip():
+                break
+            self.fields[json.loads(match.group(1))] = value
+            self._pos = end
+            completed = True
+        return completed
+
+def _print_sections(sections, fields, start=0):
+    """Print sections in order for as long as their fields are available.
+    
+    Returns the index of the first section that hasn't been printed.
+    """
+    for i in range(start, len(sections)):
+        keys, show = sections[i]
+        if not all(key in fields for key in keys):
+            return i
+        show(fields)
+    return len(sections)
+
+def _show_scenario_header(scenario):
+    print("\n" + "=" * 80)
+    print(f"From: {scenario['sender_name']} ({scenario['sender_position']})")
+    print(f"To: {scenario['recipient_name']} ({scenario['recipient_position']})")
+    print(f"Subject: {scenario['email_subject']}")
+    print("=" * 80)
+
+def _show_scenario_body(scenario):
+    print(scenario['email_body'])
+
+def _show_scenario_tasks(scenario):
+    print("\n" + "=" * 80)
+    print("Tasks:")
+    for task in scenario['tasks']:
+        print(f"- {task}")
+    print("\n" + "=" * 80)
+
+# Parts of the email in display order, with the fields each one needs
+_SCENARIO_SECTIONS = (
+    (("sender_name", "sender_position", "recipient_name", "recipient_position", "email_subject"), _show_scenario_header),
+    (("email_body",), _show_scenario_body),
+    (("tasks",), _show_scenario_tasks)
+)
+
+def _show_evaluation_header(evaluation):
+    print("\n" + "=" * 80)
+    print("Response Evaluation")
+    print("=" * 80)
+
+def _evaluation_area(name, field):
+    def show(evaluation):
+        print(f"{name}: {evaluation[field + '_score']}/5")
+        print(evaluation[field + '_feedback'])
+        print()
+    return (field + "_score", field + "_feedback"), show
+
+def _show_overall(evaluation):
+    print("=" * 80)
+    print(f"Overall Score: {evaluation['overall_score']}/5")
+    print(evaluation['overall_feedback'])
+    print("\n" + "=" * 80)
+
+def _show_improved_response(evaluation):
+    print("Suggested Improved Response:")
+    print(evaluation['improved_response'])
+    print("\n" + "=" * 80)
+
+# Parts of the evaluation in display order, with the fields each one needs
+_EVALUATION_SECTIONS = (
+    ((), _show_evaluation_header),
+    _evaluation_area("Task Completion", "task_completion"),
+    _evaluation_area("Organization", "organization"),
+    _evaluation_area("Sentence Variety", "sentence_variety"),
+    _evaluation_area("Grammar", "grammar"),
+    _evaluation_area("Vocabulary", "vocabulary"),
+    (("overall_score", "overall_feedback"), _show_overall),
+    (("improved_response",), _show_improved_response)
+)
+
+# Task types with the template for their description and the most items a
+# task may ask for, e.g. "Ask TWO questions."
+TASK_TEMPLATES = {
+    "Ask questions": ("Ask {n} question{s}.", 3),
+    "Request information": ("Make {n} request{s} for information.", 2),
+    "Make suggestions": ("Make {n} suggestion{s}.", 2),
+    "Provide information": ("Give {n} piece{s} of information.", 3),
+    "Explain problems": ("Explain {n} problem{s}.", 2)
+}
+# Scores stored for each response, in the order of the evaluation areas
+SCORE_FIELDS = (
+    "task_completion_score",
+    "organization_score",
+    "sentence_variety_score",
+    "grammar_score",
+    "vocabulary_score",
+    "overall_score"
+)
+
+NUM_WORD = ("", "ONE", "TWO", "THREE", "FOUR", "FIVE")
+PLURAL_S = ("", "", "s", "s", "s", "s")
+
+# Up to CACHE_CAPACITY scenarios are kept per context; once CACHE_POOL_SIZE
+# are cached, new requests may be served from them. Each scenario carries its
+# own task list, so the tasks drawn for a request don't split the pool
+CACHE_CAPACITY = 10
+CACHE_POOL_SIZE = 5
+CACHE_REUSE_PROBABILITY = 0.5
+
+# Scenarios requested together once the first one of a session is shown
+SCENARIO_BATCH_SIZE = 5
+
+# Failed requests are retried by the OpenAI client with exponential backoff,
+# honouring Retry-After; requests are also spaced to stay under the rate limit
+MAX_RETRIES = 5
+REQUESTS_PER_MINUTE = 60
+
+# Time allowed for each response, in seconds
+RESPONSE_TIME_LIMIT = 10 * 60
 
 class TOEICEmailResponsePractice:
     def __init__(self):
         self.api_key = None
         self.client = None
+        self._http = None
+        self._loop = None
+        self._request_times = deque()
+        self._scenario_queue = deque()
+        self._queue_context = None
         self.email_contexts = [
             "Office issues",
             "Job ads and applications",
@@ -19,34 +350,160 @@ class TOEICEmailResponsePractice:
             "Schedules",
             "Appointments"
         ]
-        self.task_types = [
-            "Ask questions",
-            "Request information",
-            "Make suggestions",
-            "Provide information",
-            "Explain problems"
-        ]
-        self.history_file = "part6_7_history.json"
-        self.history = self.load_history()
+        self.task_types = tuple(TASK_TEMPLATES)
+        self.db_file = "part6_7.db"
+        self.legacy_history_file = "part6_7_history.json"
+        self.export_file = "part6_7_history_export.json"
+        self.cache_file = "part6_7_cache.json"
+        self.batches_file = "part6_7_batches.json"
+        self.db = self.open_history()
+        self.cache = self.load_cache()
         
-    def load_history(self):
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return {"sessions": [], "total_responses": 0}
-        return {"sessions": [], "total_responses": 0}
+    def open_history(self):
+        db = sqlite3.connect(self.db_file, isolation_level=None)
+        # WAL with NORMAL sync avoids an fsync per saved session
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY,
+                date TEXT NOT NULL,
+                context TEXT NOT NULL,
+                average_score REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS responses (
+                id INTEGER PRIMARY KEY,
+                session_id INTEGER NOT NULL REFERENCES sessions(id),
+                task_completion_score INTEGER NOT NULL,
+                organization_score INTEGER NOT NULL,
+                sentence_variety_score INTEGER NOT NULL,
+                grammar_score INTEGER NOT NULL,
+                vocabulary_score INTEGER NOT NULL,
+                overall_score INTEGER NOT NULL,
+                feedback TEXT
+            );
+            -- Covers the statistics: the averages scan this index instead of
+            -- the table rows, and sessions count their responses from it
+            CREATE INDEX IF NOT EXISTS responses_scores ON responses(
+                session_id, task_completion_score, organization_score, sentence_variety_score,
+                grammar_score, vocabulary_score, overall_score
+            );
+            -- The email and the user's text are only read when a response is
+            -- reviewed, so they are kept out of the rows the statistics scan
+            CREATE TABLE IF NOT EXISTS response_texts (
+                response_id INTEGER PRIMARY KEY REFERENCES responses(id),
+                scenario TEXT NOT NULL,
+                user_response TEXT NOT NULL
+            );
+        """)
+        
+        if db.execute("SELECT NOT EXISTS (SELECT 1 FROM sessions)").fetchone()[0]:
+            self._import_legacy_history(db)
+        return db
+    
+    def _import_legacy_history(self, db):
+        # One-shot import of the old JSON history into the empty database
+        try:
+            with open(self.legacy_history_file, 'rb') as f:
+                sessions = _json_loads(f.read()).get("sessions", [])
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        db.execute("BEGIN")
+        try:
+            for session in sessions:
+                self._insert_session(db, session)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+    
+    def _insert_session(self, db, session):
+        session_id = db.execute(
+            "INSERT INTO sessions (date, context, average_score) VALUES (?, ?, ?)",
+            (session["date"], session["context"], session["average_score"])
+        ).lastrowid
+        for response in session["responses"]:
+            response_id = db.execute(
+                f"INSERT INTO responses (session_id, {', '.join(SCORE_FIELDS)}, feedback) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, *(response["scores"][field] for field in SCORE_FIELDS), response.get("feedback"))
+            ).lastrowid
+            db.execute(
+                "INSERT INTO response_texts (response_id, scenario, user_response) VALUES (?, ?, ?)",
+                (response_id, json.dumps(response["scenario"]), response["user_response"])
+            )
+    
+    def save_history(self, session):
+        # One transaction per session; earlier sessions are never rewritten
+        self.db.execute("BEGIN")
+        try:
+            self._insert_session(self.db, session)
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
     
-    def save_history(self):
-        with open(self.history_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
+    def export_history(self):
+        """Write the whole history to a JSON file in the original format."""
+        sessions = []
+        by_id = {}
+        for session_id, date, context, average_score in self.db.execute(
+            "SELECT id, date, context, average_score FROM sessions ORDER BY id"
+        ):
+            by_id[session_id] = {"date": date, "context": context, "responses": [], "average_score": average_score}
+            sessions.append(by_id[session_id])
+        for session_id, *scores, feedback, scenario, user_response in self.db.execute(
+            f"SELECT r.session_id, {', '.join('r.' + field for field in SCORE_FIELDS)}, r.feedback, t.scenario, t.user_response"
+            " FROM responses r JOIN response_texts t ON t.response_id = r.id ORDER BY r.id"
+        ):
+            by_id[session_id]["responses"].append({
+                "scenario": _json_loads(scenario),
+                "user_response": user_response,
+                "scores": dict(zip(SCORE_FIELDS, scores)),
+                "feedback": feedback
+            })
+        
+        history = {"sessions": sessions, "total_responses": sum(len(session["responses"]) for session in sessions)}
+        with open(self.export_file, 'w') as f:
+            json.dump(history, f, indent=2)
+        print(f"History exported to {self.export_file}.")
+    
+    def load_cache(self):
+        try:
+            with open(self.cache_file, 'rb') as f:
+                data = _json_loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return {key: deque(items, maxlen=CACHE_CAPACITY) for key, items in data.items()}
+    
+    def save_cache(self):
+        # Written compactly to a temporary file and swapped in, so an
+        # interrupted save can't leave a truncated cache behind
+        temp_file = self.cache_file + ".tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(_json_dumps({key: list(items) for key, items in self.cache.items()}))
+        os.replace(temp_file, self.cache_file)
+    
+    def _get_cached(self, key):
+        # Reuse a previously generated scenario once enough variants are cached.
+        # Evaluations are never cached, since they depend on the user's response
+        cached = self.cache.get(key)
+        if cached and len(cached) >= CACHE_POOL_SIZE and random.random() < CACHE_REUSE_PROBABILITY:
+            return dict(random.choice(cached))
+        return None
+    
+    def _add_to_cache(self, key, scenario):
+        self.cache.setdefault(key, deque(maxlen=CACHE_CAPACITY)).append(scenario)
     
     def setup_api(self):
+        # Imported here so that viewing statistics doesn't load the OpenAI client
+        import httpx
+        import openai
+        
         # Check if API key is already set in environment
         self.api_key = os.environ.get("OPENAI_API_KEY")
         
         if not self.api_key:
+            from getpass import getpass
             print("\nOpenAI API key not found in environment variables.")
             self.api_key = getpass("Please enter your OpenAI API key: ")
             # Ask if user wants to save the API key to environment
@@ -57,17 +514,60 @@ class TOEICEmailResponsePractice:
                 print("API key saved to ~/.bashrc. Please restart your terminal or run 'source ~/.bashrc' to apply.")
         
         try:
-            self.client = openai.OpenAI(api_key=self.api_key)
+            # One connection pool, kept alive between requests, serves the
+            # prefetched scenarios and the evaluations
+            self._http = openai.DefaultAsyncHttpxClient(
+                http2=h2 is not None,
+                timeout=60,
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=8)
+            )
+            self.client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=MAX_RETRIES, http_client=self._http)
+            self._start_event_loop()
             print("API connection established successfully!")
             return True
         except Exception as e:
             print(f"Error setting up OpenAI API: {e}")
             return False
     
-    def generate_email_scenario(self, context=None):
-        if not context:
-            context = random.choice(self.email_contexts)
-        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Close the shared HTTP client and stop the background event loop."""
+        if self._loop is None:
+            return
+        if self._http is not None:
+            self._submit(self._http.aclose()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+    
+    def _start_event_loop(self):
+        # API calls run on a background event loop so the next scenario can be
+        # generated while the main thread keeps reading the user's response
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+    
+    def _submit(self, coro):
+        """Schedule a coroutine on the background loop and return its future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    async def _wait_for_rate_limit(self):
+        """Wait until a request can be sent without exceeding REQUESTS_PER_MINUTE."""
+        # Requests all start on the event loop thread, so no lock is needed
+        while True:
+            now = time.monotonic()
+            while self._request_times and now - self._request_times[0] >= 60:
+                self._request_times.popleft()
+            if len(self._request_times) < REQUESTS_PER_MINUTE:
+                self._request_times.append(now)
+                return
+            await asyncio.sleep(60 - (now - self._request_times[0]))
+    
+    def _draw_tasks(self):
+        """Pick the task types for a scenario and describe each one."""
         # Randomly determine the number of tasks (between 1 and 3)
         num_tasks = random.randint(1, 3)
         
@@ -77,202 +577,309 @@ class TOEICEmailResponsePractice:
         # Generate task descriptions
         tasks = []
         for task_type in selected_task_types:
-            if task_type == "Ask questions":
-                count = random.randint(1, 3)
-                tasks.append(f"Ask {self._number_to_word(count).upper()} question{'s' if count > 1 else ''}.")
-            elif task_type == "Request information":
-                count = random.randint(1, 2)
-                tasks.append(f"Make {self._number_to_word(count).upper()} request{'s' if count > 1 else ''} for information.")
-            elif task_type == "Make suggestions":
-                count = random.randint(1, 2)
-                tasks.append(f"Make {self._number_to_word(count).upper()} suggestion{'s' if count > 1 else ''}.")
-            elif task_type == "Provide information":
-                count = random.randint(1, 3)
-                tasks.append(f"Give {self._number_to_word(count).upper()} piece{'s' if count > 1 else ''} of information.")
-            elif task_type == "Explain problems":
-                count = random.randint(1, 2)
-                tasks.append(f"Explain {self._number_to_word(count).upper()} problem{'s' if count > 1 else ''}.")
-        
-        prompt = f"""
-        Generate a realistic email scenario for a TOEIC Writing test (Questions 6-7).
-        The email should be related to: {context}
-        
-        The response should require the test-taker to perform the following tasks:
-        {', '.join(tasks)}
-        
-        Format the response as a JSON object with these fields:
-        - email_subject: A clear subject line for the email
-        - sender_name: The name of the person sending the email
-        - sender_position: The position or role of the sender
-        - recipient_name: The name of the intended recipient (the test-taker)
-        - recipient_position: The position or role of the recipient
-        - email_body: The full content of the email (150-200 words)
-        - context: The context of the email ({context})
-        - tasks: An array of the specific tasks the test-taker needs to address in their response {tasks}
-        - key_points: 3-5 key points that should be addressed in a good response
-        - sample_response: A sample good response to the email that addresses all the tasks
-        """
+            template, max_count = TASK_TEMPLATES[task_type]
+            count = random.randint(1, max_count)
+            tasks.append(template.format(n=NUM_WORD[count], s=PLURAL_S[count]))
+        return tasks
+    
+    async def generate_email_scenario(self, context=None, show=False):
+        """Generate an email scenario, printing it as it arrives if show is set."""
+        if not context:
+            context = random.choice(self.email_contexts)
+        
+        cached = self._get_cached(context)
+        if cached:
+            if show:
+                self.display_email_scenario(cached)
+            return cached
+        
+        tasks = self._draw_tasks()
+        prompt = _SCENARIO_PROMPT.format(context=context, tasks=", ".join(tasks))
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}]
+            await self._wait_for_rate_limit()
+            stream = await self.client.chat.completions.create(
+                model=_MODEL,
+                messages=_messages(prompt),
+                response_format=_SCENARIO_FORMAT,
+                max_tokens=SCENARIO_MAX_TOKENS,
+                stream=True
             )
             
-            # Parse the response content as JSON
-            try:
-                result = json.loads(response.choices[0].message.content)
-                return result
-            except json.JSONDecodeError:
-                # If JSON parsing fails, create a fallback
-                fallback_result = {
-                    "email_subject": f"Regarding {context}",
-                    "sender_name": "John Smith",
-                    "sender_position": "Manager",
-                    "recipient_name": "Test Taker",
-                    "recipient_position": "Employee",
-                    "email_body": f"This is a fallback email about {context}. Please respond addressing the following tasks: {', '.join(tasks)}",
-                    "context": context,
-                    "tasks": tasks,
-                    "key_points": ["Be professional", "Address all tasks", "Use correct grammar", "Be concise"],
-                    "sample_response": "This is a sample response that would address all the required tasks."
-                }
-                
-                return fallback_result
+            # Print each part of the email as soon as its fields are complete
+            parser = _JSONFieldStream()
+            printed = 0
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta and parser.consume(delta) and show:
+                    printed = _print_sections(_SCENARIO_SECTIONS, parser.fields, printed)
+            
+            result = _json_loads(parser.text)
+            if show:
+                _print_sections(_SCENARIO_SECTIONS, result, printed)
+            self._add_to_cache(context, result)
+            self.save_cache()
+            return result
         except Exception as e:
             print(f"Error generating email scenario: {e}")
             return None
     
-    def evaluate_response(self, response, scenario):
-        evaluation_prompt = f"""
-        Evaluate the following email response written for a TOEIC Writing test (Questions 6-7):
-        
-        Original Email Subject: {scenario['email_subject']}
-        Original Email Body: {scenario['email_body']}
-        
-        Required Tasks: {', '.join(scenario['tasks'])}
-        
-        Student Response:
-        {response}
-        
-        Please evaluate the response based on:
-        1. Task Completion (whether all required tasks were addressed)
-        2. Organization (structure, coherence, use of connecting words)
-        3. Sentence Variety (use of different sentence types and structures)
-        4. Grammar (grammatical accuracy)
-        5. Vocabulary (appropriate word choice)
-        
-        Provide specific feedback for improvement in each area and an overall assessment.
-        
-        Format the response as a JSON object with these fields:
-        - task_completion_score: A score from 1-5 for task completion
-        - organization_score: A score from 1-5 for organization
-        - sentence_variety_score: A score from 1-5 for sentence variety
-        - grammar_score: A score from 1-5 for grammar
-        - vocabulary_score: A score from 1-5 for vocabulary
-        - overall_score: An overall score from 1-5
-        - task_completion_feedback: Specific feedback on task completion
-        - organization_feedback: Specific feedback on organization
-        - sentence_variety_feedback: Specific feedback on sentence variety
-        - grammar_feedback: Specific feedback on grammar
-        - vocabulary_feedback: Specific feedback on vocabulary
-        - overall_feedback: General feedback and suggestions for improvement
-        - improved_response: A suggested improved response
-        """
-        
+    def _evaluation_prompt(self, response, scenario):
+        return _EVALUATION_PROMPT.format(
+            subject=scenario['email_subject'],
+            body=scenario['email_body'],
+            tasks=", ".join(scenario['tasks']),
+            response=response
+        )
+    
+    async def evaluate_response(self, response, scenario):
+        """Evaluate a response, printing the feedback as it arrives."""
         try:
-            response_eval = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": evaluation_prompt}]
+            await self._wait_for_rate_limit()
+            stream = await self.client.chat.completions.create(
+                model=_MODEL,
+                messages=_messages(self._evaluation_prompt(response, scenario)),
+                response_format=_EVALUATION_FORMAT,
+                max_tokens=EVALUATION_MAX_TOKENS,
+                temperature=EVALUATION_TEMPERATURE,
+                stream=True
             )
             
-            # Parse the response content as JSON
-            try:
-                result = json.loads(response_eval.choices[0].message.content)
-                return result
-            except json.JSONDecodeError:
-                # If JSON parsing fails, create a fallback
-                fallback_result = {
-                    "task_completion_score": 3,
-                    "organization_score": 3,
-                    "sentence_variety_score": 3,
-                    "grammar_score": 3,
-                    "vocabulary_score": 3,
-                    "overall_score": 3,
-                    "task_completion_feedback": "Unable to provide detailed feedback on task completion. Please try again.",
-                    "organization_feedback": "Unable to provide detailed feedback on organization. Please try again.",
-                    "sentence_variety_feedback": "Unable to provide detailed feedback on sentence variety. Please try again.",
-                    "grammar_feedback": "Unable to provide detailed feedback on grammar. Please try again.",
-                    "vocabulary_feedback": "Unable to provide detailed feedback on vocabulary. Please try again.",
-                    "overall_feedback": "Unable to provide detailed overall feedback. Please try again.",
-                    "improved_response": "Unable to provide an improved response. Please try again."
-                }
-                
-                return fallback_result
+            # Print the feedback for each area as soon as it is complete
+            parser = _JSONFieldStream()
+            printed = 0
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta and parser.consume(delta):
+                    printed = _print_sections(_EVALUATION_SECTIONS, parser.fields, printed)
+            
+            result = _json_loads(parser.text)
+            _print_sections(_EVALUATION_SECTIONS, result, printed)
+            return result
         except Exception as e:
             print(f"Error evaluating response: {e}")
             return None
     
-    def display_email_scenario(self, scenario):
-        print("\n" + "=" * 80)
-        print(f"From: {scenario['sender_name']} ({scenario['sender_position']})")
-        print(f"To: {scenario['recipient_name']} ({scenario['recipient_position']})")
-        print(f"Subject: {scenario['email_subject']}")
-        print("=" * 80)
-        print(scenario['email_body'])
-        print("\n" + "=" * 80)
-        print("Tasks:")
-        for task in scenario['tasks']:
-            print(f"- {task}")
-        print("\n" + "=" * 80)
-    
-    def display_evaluation(self, evaluation):
-        print("\n" + "=" * 80)
-        print("Response Evaluation")
-        print("=" * 80)
+    async def generate_scenarios_batch(self, n, context=None):
+        """Generate n scenarios with a single API request.
         
-        print(f"Task Completion: {evaluation['task_completion_score']}/5")
-        print(evaluation['task_completion_feedback'])
-        print()
+        Cached scenarios are used where available; scenarios the response
+        doesn't include are left out of the returned list.
+        """
+        scenarios = [None] * n
+        specs = []
+        for i in range(n):
+            scenario_context = context or random.choice(self.email_contexts)
+            cached = self._get_cached(scenario_context)
+            if cached:
+                scenarios[i] = cached
+            else:
+                specs.append((i, scenario_context, self._draw_tasks()))
         
-        print(f"Organization: {evaluation['organization_score']}/5")
-        print(evaluation['organization_feedback'])
-        print()
+        if specs:
+            spec_lines = "\n".join(
+                _SCENARIO_SPEC.format(number=number, context=scenario_context, tasks=", ".join(tasks))
+                for number, (_, scenario_context, tasks) in enumerate(specs, 1)
+            )
+            prompt = _SCENARIOS_PROMPT.format(count=len(specs), specs=spec_lines)
+            
+            try:
+                await self._wait_for_rate_limit()
+                response = await self.client.chat.completions.create(
+                    model=_MODEL,
+                    messages=_messages(prompt),
+                    response_format=_SCENARIOS_FORMAT,
+                    max_tokens=SCENARIO_MAX_TOKENS * len(specs)
+                )
+                results = _json_loads(response.choices[0].message.content)['scenarios']
+            except Exception as e:
+                # Missing scenarios are generated one by one when needed
+                print(f"Error generating email scenarios: {e}")
+                results = []
+            
+            for (i, scenario_context, _), result in zip(specs, results):
+                scenarios[i] = result
+                self._add_to_cache(scenario_context, result)
+            if results:
+                self.save_cache()
         
-        print(f"Sentence Variety: {evaluation['sentence_variety_score']}/5")
-        print(evaluation['sentence_variety_feedback'])
-        print()
+        return [scenario for scenario in scenarios if scenario]
+    
+    async def next_scenario(self, context=None):
+        """Return the next queued scenario, refilling the queue with one batched request."""
+        if context != self._queue_context:
+            self._scenario_queue.clear()
+            self._queue_context = context
+        if not self._scenario_queue:
+            self._scenario_queue.extend(await self.generate_scenarios_batch(SCENARIO_BATCH_SIZE, context))
+        if self._scenario_queue:
+            return self._scenario_queue.popleft()
+        return await self.generate_email_scenario(context)
+    
+    def _load_json_list(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return _json_loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+    
+    def _save_json_list(self, path, items):
+        with open(path, 'wb') as f:
+            f.write(_json_dumps(items))
+    
+    async def submit_evaluations(self, session, responses):
+        """Submit a Batch API job evaluating the responses of a session.
         
-        print(f"Grammar: {evaluation['grammar_score']}/5")
-        print(evaluation['grammar_feedback'])
-        print()
+        Batch jobs are cheaper than regular requests but may take up to a day;
+        collect_evaluations saves the session once the evaluations are ready.
+        """
+        lines = []
+        for i, response in enumerate(responses):
+            lines.append(_json_dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": _MODEL,
+                    "messages": _messages(self._evaluation_prompt(response["user_response"], response["scenario"])),
+                    "response_format": _EVALUATION_FORMAT,
+                    "max_tokens": EVALUATION_MAX_TOKENS,
+                    "temperature": EVALUATION_TEMPERATURE
+                }
+            }) + b"\n")
         
-        print(f"Vocabulary: {evaluation['vocabulary_score']}/5")
-        print(evaluation['vocabulary_feedback'])
-        print()
+        try:
+            await self._wait_for_rate_limit()
+            input_file = await self.client.files.create(file=("part6_7_batch.jsonl", b"".join(lines)), purpose="batch")
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+        except Exception as e:
+            print(f"Error submitting batch: {e}")
+            return False
         
-        print("=" * 80)
-        print(f"Overall Score: {evaluation['overall_score']}/5")
-        print(evaluation['overall_feedback'])
-        print("\n" + "=" * 80)
+        # Keep the session and its responses until the batch is collected
+        pending = self._load_json_list(self.batches_file)
+        pending.append({"id": batch.id, "session": session, "responses": responses})
+        self._save_json_list(self.batches_file, pending)
+        print(f"Submitted batch {batch.id} with {len(lines)} responses.")
+        return True
+    
+    def collect_evaluations(self):
+        """Show and save the sessions of finished evaluation batch jobs."""
+        if not self.client and not self.setup_api():
+            return
         
-        print("Suggested Improved Response:")
-        print(evaluation['improved_response'])
-        print("\n" + "=" * 80)
+        # The history database belongs to the main thread, so the sessions are
+        # saved here once the background loop has fetched them
+        for session in self._submit(self._collect_batches()).result():
+            self._finish_session(session)
+    
+    async def _collect_batches(self):
+        """Fetch finished evaluation batch jobs and return their sessions."""
+        pending = self._load_json_list(self.batches_file)
+        if not pending:
+            print("No batch jobs pending.")
+            return []
+        
+        sessions = []
+        still_pending = []
+        for entry in pending:
+            try:
+                batch = await self.client.batches.retrieve(entry['id'])
+            except Exception as e:
+                print(f"Error checking batch {entry['id']}: {e}")
+                still_pending.append(entry)
+                continue
+            
+            if batch.status in ("failed", "expired", "cancelled"):
+                print(f"Batch {batch.id} {batch.status}; discarding it.")
+                continue
+            if batch.status != "completed":
+                print(f"Batch {batch.id} is still {batch.status}.")
+                still_pending.append(entry)
+                continue
+            
+            try:
+                output = await self.client.files.content(batch.output_file_id)
+            except Exception as e:
+                print(f"Error downloading batch {batch.id}: {e}")
+                still_pending.append(entry)
+                continue
+            
+            evaluations = {}
+            for line in output.content.splitlines():
+                if not line.strip():
+                    continue
+                result = _json_loads(line)
+                response = result.get('response') or {}
+                if response.get('status_code') != 200:
+                    continue
+                try:
+                    evaluations[result['custom_id']] = _json_loads(response['body']['choices'][0]['message']['content'])
+                except (KeyError, IndexError, TypeError, ValueError):
+                    continue
+            
+            session = entry['session']
+            print(f"\nSession of {session['date']} ({len(evaluations)}/{len(entry['responses'])} responses evaluated)")
+            for i, response in enumerate(entry['responses']):
+                evaluation = evaluations.get(str(i))
+                if not evaluation:
+                    continue
+                print(f"\nEmail: {response['scenario']['email_subject']}")
+                self.display_evaluation(evaluation)
+                session["responses"].append(self._response_record(response["scenario"], response["user_response"], evaluation))
+            sessions.append(session)
+        
+        self._save_json_list(self.batches_file, still_pending)
+        return sessions
     
-    def _number_to_word(self, number):
-        """Convert a number to its word representation."""
-        words = {
-            1: "one",
-            2: "two",
-            3: "three",
-            4: "four",
-            5: "five"
+    def _response_record(self, scenario, user_response, evaluation):
+        return {
+            "scenario": scenario,
+            "user_response": user_response,
+            "scores": {field: evaluation[field] for field in SCORE_FIELDS},
+            "feedback": evaluation["overall_feedback"]
         }
-        return words.get(number, str(number))
-
+    
+    def _finish_session(self, session):
+        # Calculate average score for the session
+        if session["responses"]:
+            total_score = sum(response["scores"]["overall_score"] for response in session["responses"])
+            session["average_score"] = total_score / len(session["responses"])
+        
+        # Update history
+        self.save_history(session)
+    
+    async def _countdown(self, time_limit):
+        """Print the remaining time every minute, and every 10 seconds in the last minute."""
+        remaining = time_limit
+        while remaining > 0:
+            # Sleep until the next whole minute, or next 10 seconds in the last minute
+            step = (remaining % 60 or 60) if remaining > 60 else (remaining % 10 or 10)
+            await asyncio.sleep(step)
+            remaining -= step
+            if remaining >= 60:
+                print(f"\nRemaining time: {remaining // 60} minutes")
+            elif remaining > 0:
+                print(f"\nRemaining time: {remaining} seconds")
+        print("\nTime's up! Press Enter to submit your response.")
+    
+    def display_email_scenario(self, scenario):
+        _print_sections(_SCENARIO_SECTIONS, scenario)
+    
+    def display_evaluation(self, evaluation):
+        _print_sections(_EVALUATION_SECTIONS, evaluation)
+    
     def display_statistics(self):
-        if not self.history["sessions"]:
+        total_sessions = self.db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        if not total_sessions:
             print("\nNo practice sessions found. Start practicing to see your statistics!")
             return
         
@@ -280,37 +887,17 @@ class TOEICEmailResponsePractice:
         print("TOEIC Email Response Practice Statistics")
         print("=" * 80)
         
-        total_sessions = len(self.history["sessions"])
-        total_responses = self.history["total_responses"]
+        # Count and average every score in one query
+        total_responses, *averages = self.db.execute(
+            f"SELECT COUNT(*), {', '.join(f'AVG({field})' for field in SCORE_FIELDS)} FROM responses"
+        ).fetchone()
         
         print(f"Total Practice Sessions: {total_sessions}")
         print(f"Total Email Responses: {total_responses}")
         print()
         
-        # Calculate average scores
-        avg_task_completion = 0
-        avg_organization = 0
-        avg_sentence_variety = 0
-        avg_grammar = 0
-        avg_vocabulary = 0
-        avg_overall = 0
-        
-        for session in self.history["sessions"]:
-            for response in session["responses"]:
-                avg_task_completion += response["scores"]["task_completion_score"]
-                avg_organization += response["scores"]["organization_score"]
-                avg_sentence_variety += response["scores"]["sentence_variety_score"]
-                avg_grammar += response["scores"]["grammar_score"]
-                avg_vocabulary += response["scores"]["vocabulary_score"]
-                avg_overall += response["scores"]["overall_score"]
-        
         if total_responses > 0:
-            avg_task_completion /= total_responses
-            avg_organization /= total_responses
-            avg_sentence_variety /= total_responses
-            avg_grammar /= total_responses
-            avg_vocabulary /= total_responses
-            avg_overall /= total_responses
+            avg_task_completion, avg_organization, avg_sentence_variety, avg_grammar, avg_vocabulary, avg_overall = averages
             
             print("Average Scores:")
             print(f"Task Completion: {avg_task_completion:.2f}/5")
@@ -324,15 +911,61 @@ class TOEICEmailResponsePractice:
         print("Recent Practice Sessions:")
         
         # Display the 5 most recent sessions
-        recent_sessions = self.history["sessions"][-5:]
-        for i, session in enumerate(reversed(recent_sessions)):
-            print(f"\nSession {len(self.history['sessions']) - i}: {session['date']}")
-            print(f"Email Context: {session['context']}")
-            print(f"Number of Responses: {len(session['responses'])}")
-            print(f"Average Score: {session['average_score']:.2f}/5")
-
-    def run_practice_session(self, context=None):
-        """Run a complete practice session with one or more email responses."""
+        recent_sessions = self.db.execute(
+            "SELECT s.date, s.context, s.average_score,"
+            " (SELECT COUNT(*) FROM responses r WHERE r.session_id = s.id)"
+            " FROM sessions s ORDER BY s.id DESC LIMIT 5"
+        )
+        for i, (date, context, average_score, num_responses) in enumerate(recent_sessions):
+            print(f"\nSession {total_sessions - i}: {date}")
+            print(f"Email Context: {context}")
+            print(f"Number of Responses: {num_responses}")
+            print(f"Average Score: {average_score:.2f}/5")
+
+    def review_responses(self):
+        """List recent responses and show the email and text of a chosen one."""
+        recent_responses = self.db.execute(
+            "SELECT r.id, s.date, r.overall_score FROM responses r JOIN sessions s ON s.id = r.session_id"
+            " ORDER BY r.id DESC LIMIT 10"
+        ).fetchall()
+        if not recent_responses:
+            print("\nNo responses found. Start practicing to review your responses!")
+            return
+        
+        print("\nRecent Responses:")
+        for response_id, date, overall_score in recent_responses:
+            print(f"{response_id}. {date} - Overall Score: {overall_score}/5")
+        
+        try:
+            response_id = int(input("\nEnter a response number to review: "))
+        except ValueError:
+            print("Invalid input. Please enter a number.")
+            return
+        self.show_response(response_id)
+    
+    def show_response(self, response_id):
+        row = self.db.execute(
+            "SELECT scenario, user_response FROM response_texts WHERE response_id = ?", (response_id,)
+        ).fetchone()
+        if not row:
+            print("No response found with that number.")
+            return
+        
+        scenario, user_response = row
+        self.display_email_scenario(_json_loads(scenario))
+        print("Your Response:")
+        print(user_response)
+        print("=" * 80)
+    
+    def run_practice_session(self, context=None, evaluate_later=False):
+        """Run a complete practice session with one or more email responses.
+        
+        With evaluate_later, the responses are evaluated by a Batch API job
+        instead, and the session is saved when the evaluations are collected.
+        """
+        if not self.client and not self.setup_api():
+            return
+        
         # Create a new session record
         session = {
             "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -340,27 +973,41 @@ class TOEICEmailResponsePractice:
             "responses": [],
             "average_score": 0
         }
+        deferred_responses = []
         
+        # The first scenario is printed as it streams in; later ones are
+        # generated in the background and printed once the user gets to them
+        print("\nGenerating email scenario...")
+        next_scenario = self._submit(self.generate_email_scenario(context, show=True))
+        displayed = True
         continue_session = True
         while continue_session:
-            # Generate an email scenario
-            print("\nGenerating email scenario...")
-            scenario = self.generate_email_scenario(context)
+            # Use the scenario generated in the background, waiting if needed
+            if not next_scenario.done() and not displayed:
+                print("\nGenerating email scenario...")
+            scenario = next_scenario.result()
+            already_displayed, displayed = displayed, False
+            
+            # The next scenario is prepared while the user writes this response;
+            # later ones come from a queue filled with one batched request
+            next_scenario = self._submit(self.next_scenario(context))
             
             if not scenario:
                 print("Failed to generate an email scenario. Please try again.")
                 continue
             
             # Display the email scenario
-            self.display_email_scenario(scenario)
+            if not already_displayed:
+                self.display_email_scenario(scenario)
             
             # Get user's response
             print("\nWrite your response to the email. Press Enter twice when finished.")
             print("You have 10 minutes to complete your response.")
             
-            # Start a timer
-            start_time = time.time()
-            time_limit = 10 * 60  # 10 minutes in seconds
+            # The remaining time is announced from the background loop, so it
+            # doesn't depend on when the user presses Enter
+            deadline = time.monotonic() + RESPONSE_TIME_LIMIT
+            countdown = self._submit(self._countdown(RESPONSE_TIME_LIMIT))
             
             # Collect user's response
             user_response = ""
@@ -371,112 +1018,101 @@ class TOEICEmailResponsePractice:
                 user_response += line + "\n"
                 
                 # Check if time is up
-                elapsed_time = time.time() - start_time
-                if elapsed_time >= time_limit:
+                if time.monotonic() >= deadline:
                     print("\nTime's up! Your response has been submitted.")
                     break
-                
-                # Show remaining time every minute
-                remaining_time = time_limit - elapsed_time
-                if remaining_time <= 60 and int(remaining_time) % 10 == 0:  # Every 10 seconds in the last minute
-                    print(f"\nRemaining time: {int(remaining_time)} seconds")
-                elif int(elapsed_time) % 60 == 0 and elapsed_time > 0:  # Every minute
-                    print(f"\nRemaining time: {int(remaining_time / 60)} minutes")
-            
-            # Evaluate the response
-            print("\nEvaluating your response...")
-            evaluation = self.evaluate_response(user_response, scenario)
+            countdown.cancel()
             
-            if not evaluation:
-                print("Failed to evaluate your response. Please try again.")
-                continue
-            
-            # Display the evaluation
-            self.display_evaluation(evaluation)
-            
-            # Record the response in the session
-            response_record = {
-                "scenario": scenario,
-                "user_response": user_response,
-                "scores": {
-                    "task_completion_score": evaluation["task_completion_score"],
-                    "organization_score": evaluation["organization_score"],
-                    "sentence_variety_score": evaluation["sentence_variety_score"],
-                    "grammar_score": evaluation["grammar_score"],
-                    "vocabulary_score": evaluation["vocabulary_score"],
-                    "overall_score": evaluation["overall_score"]
-                },
-                "feedback": evaluation["overall_feedback"]
-            }
-            
-            session["responses"].append(response_record)
+            if evaluate_later:
+                deferred_responses.append({"scenario": scenario, "user_response": user_response})
+                print("\nYour response will be evaluated with the Batch API.")
+            else:
+                # Evaluate the response
+                print("\nEvaluating your response...")
+                evaluation = self._submit(self.evaluate_response(user_response, scenario)).result()
+                
+                if not evaluation:
+                    print("Failed to evaluate your response. Please try again.")
+                    continue
+                
+                # Record the response in the session
+                session["responses"].append(self._response_record(scenario, user_response, evaluation))
             
             # Ask if the user wants to continue
             continue_choice = input("\nWould you like to respond to another email? (y/n): ").lower()
             continue_session = continue_choice == 'y'
         
-        # Calculate average score for the session
-        if session["responses"]:
-            total_score = sum(response["scores"]["overall_score"] for response in session["responses"])
-            session["average_score"] = total_score / len(session["responses"])
+        # Don't keep generating a scenario the user will never see
+        next_scenario.cancel()
         
-        # Update history
-        self.history["sessions"].append(session)
-        self.history["total_responses"] += len(session["responses"])
-        self.save_history()
+        if evaluate_later:
+            if deferred_responses and self._submit(self.submit_evaluations(session, deferred_responses)).result():
+                print("\nPractice session completed. Collect your evaluations from the main menu once the batch has finished.")
+            return
+        
+        self._finish_session(session)
         
         print("\nPractice session completed. Your progress has been saved.")
 
 def main():
-    practice = TOEICEmailResponsePractice()
-    
-    print("\n" + "=" * 80)
-    print("TOEIC Writing Practice - Email Response (Questions 6-7)")
-    print("=" * 80)
-    print("This program helps you practice responding to emails for TOEIC Writing Questions 6-7.")
-    print("You will be given an email and specific tasks to address in your response.")
-    print("Your response will be evaluated based on task completion, organization, grammar, and more.")
-    
-    # Set up API connection
-    if not practice.setup_api():
-        print("Failed to set up API connection. Exiting.")
-        return
-    
-    while True:
+    # Closing the practice tool releases its connections when the menu exits
+    with TOEICEmailResponsePractice() as practice:
+        # --export-json writes the history out in the original JSON format
+        if "--export-json" in sys.argv[1:]:
+            practice.export_history()
+            return
+        
         print("\n" + "=" * 80)
-        print("Main Menu")
+        print("TOEIC Writing Practice - Email Response (Questions 6-7)")
         print("=" * 80)
-        print("1. Start a practice session with random email contexts")
-        print("2. Choose a specific email context for practice")
-        print("3. View your practice statistics")
-        print("4. Exit")
-        
-        choice = input("\nEnter your choice (1-4): ")
-        
-        if choice == "1":
-            practice.run_practice_session()
-        elif choice == "2":
-            print("\nAvailable Email Contexts:")
-            for i, context in enumerate(practice.email_contexts, 1):
-                print(f"{i}. {context}")
+        print("This program helps you practice responding to emails for TOEIC Writing Questions 6-7.")
+        print("You will be given an email and specific tasks to address in your response.")
+        print("Your response will be evaluated based on task completion, organization, grammar, and more.")
+        
+        while True:
+            print("\n" + "=" * 80)
+            print("Main Menu")
+            print("=" * 80)
+            print("1. Start a practice session with random email contexts")
+            print("2. Choose a specific email context for practice")
+            print("3. View your practice statistics")
+            print("4. Review a past response")
+            print("5. Start a practice session evaluated later with the Batch API (lower cost)")
+            print("6. Collect Batch API evaluations")
+            print("7. Exit")
             
-            context_choice = input(f"\nChoose a context (1-{len(practice.email_contexts)}): ")
-            try:
-                context_index = int(context_choice) - 1
-                if 0 <= context_index < len(practice.email_contexts):
-                    selected_context = practice.email_contexts[context_index]
-                    practice.run_practice_session(selected_context)
-                else:
-                    print("Invalid choice. Please try again.")
-            except ValueError:
-                print("Invalid input. Please enter a number.")
-        elif choice == "3":
-            practice.display_statistics()
-        elif choice == "4":
-            print("\nThank you for using TOEIC Writing Practice. Goodbye!")
-            break
-        else:
-            print("Invalid choice. Please try again.")
+            choice = input("\nEnter your choice (1-7): ")
+            
+            if choice == "1":
+                practice.run_practice_session()
+            elif choice == "2":
+                print("\nAvailable Email Contexts:")
+                for i, context in enumerate(practice.email_contexts, 1):
+                    print(f"{i}. {context}")
+                
+                context_choice = input(f"\nChoose a context (1-{len(practice.email_contexts)}): ")
+                try:
+                    context_index = int(context_choice) - 1
+                    if 0 <= context_index < len(practice.email_contexts):
+                        selected_context = practice.email_contexts[context_index]
+                        practice.run_practice_session(selected_context)
+                    else:
+                        print("Invalid choice. Please try again.")
+                except ValueError:
+                    print("Invalid input. Please enter a number.")
+            elif choice == "3":
+                practice.display_statistics()
+            elif choice == "4":
+                practice.review_responses()
+            elif choice == "5":
+                practice.run_practice_session(evaluate_later=True)
+            elif choice == "6":
+                practice.collect_evaluations()
+            elif choice == "7":
+                print("\nThank you for using TOEIC Writing Practice. Goodbye!")
+                break
+            else:
+                print("Invalid choice. Please try again.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,16 +1,311 @@
 #!/usr/bin/env python3
 import os
+import re
+import sys
 import json
 import random
+import hashlib
 import time
-import openai
-from getpass import getpass
+import asyncio
+import threading
 from datetime import datetime
+from collections import deque, defaultdict
+from operator import itemgetter
+
+# orjson is optional - will be used for faster JSON handling if available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+# What the test-taker is asked to do for each essay type
+_INSTRUCTION_BY_TYPE = {
+    "Express a general opinion": "Express your opinion on this topic and support it with specific reasons and examples.",
+    "Agree or disagree with a statement": "State whether you agree or disagree with this statement and support your position with specific reasons and examples.",
+    "Discuss the advantages and disadvantages": "Discuss the advantages and disadvantages of this topic, providing specific examples to support your points.",
+    "Explain your preference": "Explain your preference regarding this topic and support it with specific reasons and examples.",
+    "Explain the importance": "Explain why this topic is important and support your explanation with specific reasons and examples."
+}
+_DEFAULT_INSTRUCTION = "Write a well-organized essay with a clear thesis statement, supporting paragraphs, and a conclusion."
+
+# Time allowed for the essay, in seconds, and the length it should reach
+ESSAY_TIME_LIMIT = 30 * 60
+MIN_ESSAY_WORDS = 300
+
+# Set TOEIC_STDIN_MODE=block to read the whole essay at once until end of
+# input, e.g. when pasting a long essay or piping one in
+_STDIN_BLOCK = os.environ.get("TOEIC_STDIN_MODE") == "block"
+
+# Most API requests allowed in flight at once, so retries after a rate-limit
+# error don't all hit the API together
+MAX_CONCURRENT_REQUESTS = 8
+
+# Failed requests are retried by the OpenAI client with exponential backoff,
+# honouring Retry-After
+MAX_RETRIES = 5
+
+# Fixed instructions shared by every request; only the short user message
+# changes, so the prompt prefix can be served from OpenAI's prompt cache
+_SYSTEM_PROMPT = """You write TOEIC Writing practice material (Question 8, "Write an opinion essay") for intermediate to advanced English learners, and you evaluate the essays learners write.
+
+Essay prompts:
+- An essay prompt asks the test-taker to write an opinion essay of at least 300 words on the requested topic, in the requested essay type.
+- Format an essay prompt as a JSON object with these fields:
+  - essay_prompt: The full text of the essay prompt (50-100 words)
+  - topic: The topic of the essay, as requested
+  - essay_type: The type of essay, as requested
+  - key_points: 3-5 key points that should be addressed in a good essay
+  - suggested_structure: A brief outline of how a good essay should be structured
+  - sample_essay: A sample good essay that responds to the prompt (about 300 words)
+
+Evaluations:
+- Evaluate a learner's essay based on:
+  1. Organization (clear thesis statement, logical structure, effective conclusion)
+  2. Development (supporting ideas with specific details and examples)
+  3. Coherence and Cohesion (use of transition words and logical flow)
+  4. Grammar (grammatical accuracy and sentence structure)
+  5. Vocabulary (appropriate word choice and variety)
+- Provide specific feedback for improvement in each area and an overall assessment.
+- Format an evaluation as a JSON object with these fields:
+  - organization_score: A score from 1-5 for organization
+  - organization_feedback: Specific feedback on organization
+  - development_score: A score from 1-5 for development
+  - development_feedback: Specific feedback on development
+  - coherence_score: A score from 1-5 for coherence and cohesion
+  - coherence_feedback: Specific feedback on coherence and cohesion
+  - grammar_score: A score from 1-5 for grammar
+  - grammar_feedback: Specific feedback on grammar
+  - vocabulary_score: A score from 1-5 for vocabulary
+  - vocabulary_feedback: Specific feedback on vocabulary
+  - overall_score: An overall score from 1-5
+  - overall_feedback: General feedback and suggestions for improvement
+  - improved_essay: A suggested improved version of the essay
+- Return the fields in the order listed, so each area can be shown as soon as it is written.
+
+Example evaluation, for a prompt asking whether companies should let employees work from home:
+- Essay: a single 120-word paragraph that states "I agree" in the last sentence and gives one reason, saving commuting time, with no example.
+- organization_score 2: the position only appears at the end and there are no separate paragraphs.
+- development_score 2: one reason is given and it is not supported by an example.
+- grammar_score 4: a few article and tense errors that don't affect meaning.
+- overall_score 2
+"""
+
+# Requests with the same key are routed to the same prompt cache
+_PROMPT_CACHE_KEY = "toeic_part8"
+
+_ESSAY_PROMPT_REQUEST = (
+    "Generate an essay prompt as a JSON object.\n"
+    "Topic: {topic}\n"
+    "Essay type: {essay_type}\n"
+    "The prompt should tell the test-taker: {instruction}"
+)
+_EVALUATION_REQUEST = "Evaluate this essay as a JSON object.\n\nEssay Prompt: {essay_prompt}\n\nStudent Essay:\n{essay}"
+
+def _messages(prompt):
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+# Writing an essay prompt is a simple task for the small model; scoring an
+# essay against the rubric gets the larger one
+_GENERATION_MODEL = "gpt-4o-mini"
+_EVALUATION_MODEL = "gpt-4o"
+
+_SCORE_SCHEMA = {"type": "integer", "enum": [1, 2, 3, 4, 5]}
+
+_ESSAY_PROMPT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "essay_prompt": {"type": "string"},
+        "topic": {"type": "string"},
+        "essay_type": {"type": "string"},
+        "key_points": {"type": "array", "items": {"type": "string"}},
+        "suggested_structure": {"type": "string"},
+        "sample_essay": {"type": "string"}
+    },
+    "required": ["essay_prompt", "topic", "essay_type", "key_points", "suggested_structure", "sample_essay"],
+    "additionalProperties": False
+}
+
+_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "organization_score": _SCORE_SCHEMA,
+        "organization_feedback": {"type": "string"},
+        "development_score": _SCORE_SCHEMA,
+        "development_feedback": {"type": "string"},
+        "coherence_score": _SCORE_SCHEMA,
+        "coherence_feedback": {"type": "string"},
+        "grammar_score": _SCORE_SCHEMA,
+        "grammar_feedback": {"type": "string"},
+        "vocabulary_score": _SCORE_SCHEMA,
+        "vocabulary_feedback": {"type": "string"},
+        "overall_score": _SCORE_SCHEMA,
+        "overall_feedback": {"type": "string"},
+        "improved_essay": {"type": "string"}
+    },
+    "required": [
+        "organization_score", "organization_feedback", "development_score", "development_feedback",
+        "coherence_score", "coherence_feedback", "grammar_score", "grammar_feedback",
+        "vocabulary_score", "vocabulary_feedback", "overall_score", "overall_feedback", "improved_essay"
+    ],
+    "additionalProperties": False
+}
+
+# Structured outputs guarantee that replies parse and match these schemas,
+# with every score an integer from 1 to 5; fields are generated in schema
+# order, which is also the display order
+_ESSAY_PROMPT_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "toeic_essay_prompt", "strict": True, "schema": _ESSAY_PROMPT_SCHEMA}
+}
+
+_EVALUATION_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "toeic_essay_evaluation", "strict": True, "schema": _EVALUATION_SCHEMA}
+}
+
+# Upper bounds on the generated tokens, with headroom over a typical prompt
+# (a ~300-word sample essay plus key points) and evaluation (six feedback
+# fields plus an improved essay); a cut-off reply fails to parse
+GENERATION_MAX_TOKENS = 900
+EVALUATION_MAX_TOKENS = 1400
+
+# Prompts are varied between requests, while scoring is kept close to
+# deterministic so the same essay gets the same marks
+GENERATION_TEMPERATURE = 0.7
+EVALUATION_TEMPERATURE = 0.2
+
+# An essay resubmitted unchanged for the same prompt gets its stored
+# evaluation; the oldest evaluations are dropped beyond this many
+EVALUATION_CACHE_CAPACITY = 200
+
+# Scores stored for each essay, in the order of the evaluation areas
+SCORE_FIELDS = (
+    "organization_score",
+    "development_score",
+    "coherence_score",
+    "grammar_score",
+    "vocabulary_score",
+    "overall_score"
+)
+_score_row = itemgetter(*SCORE_FIELDS)
+
+# Fields a generated essay prompt needs before it is cached
+PROMPT_FIELDS = ("essay_prompt", "topic", "essay_type", "key_points", "suggested_structure", "sample_essay")
+
+# Sessions kept in memory for the statistics screen
+RECENT_SESSIONS = 5
+
+# Up to CACHE_CAPACITY prompts are kept per topic and essay type; once
+# CACHE_POOL_SIZE are cached, new requests may be served from them, and once
+# the pool is full every request is
+CACHE_CAPACITY = 10
+CACHE_POOL_SIZE = 5
+CACHE_REUSE_PROBABILITY = 0.5
+
+# Start of the next "key": pair in a streamed JSON object
+_FIELD_START = re.compile(r'\s*[{,]\s*("(?:[^"\\]|\\.)*")\s*:\s*')
+_DECODER = json.JSONDecoder()
+
+class _JSONFieldStream:
+    """Parse the top-level fields of a JSON object while its text streams in."""
+    
+    def __init__(self):
+        self.text = ""
+        self.fields = {}
+        self._pos = 0
+    
+    def consume(self, delta):
+        """Add a chunk of text and return True if it completed any field."""
+        self.text += delta
+        text = self.text
+        completed = False
+        while True:
+            match = _FIELD_START.match(text, self._pos)
+            if not match:
+                break
+            try:
+                value, end = _DECODER.raw_decode(text, match.end())
+            except ValueError:
+                # The value hasn't fully arrived yet
+                break
+            # A number is only known to be complete once something follows it
+            if not text[end:].strip():
+                break
+            self.fields[json.loads(match.group(1))] = value
+            self._pos = end
+            completed = True
+        return completed
+
+_SEP = "=" * 80
+
+def _write_lines(lines):
+    # One write per block of output instead of one print() per line
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+def _print_sections(sections, fields, start=0):
+    """Print sections in order for as long as their fields are available.
+    
+    Returns the index of the first section that hasn't been printed.
+    """
+    for i in range(start, len(sections)):
+        keys, show = sections[i]
+        if not all(key in fields for key in keys):
+            return i
+        show(fields)
+    return len(sections)
+
+def _show_evaluation_header(evaluation):
+    _write_lines(["\n" + _SEP, "Essay Evaluation", _SEP])
+
+def _evaluation_area(name, field):
+    def show(evaluation):
+        _write_lines([f"{name}: {evaluation[field + '_score']}/5", evaluation[field + '_feedback'], ""])
+    return (field + "_score", field + "_feedback"), show
+
+def _show_overall(evaluation):
+    _write_lines([
+        _SEP,
+        f"Overall Score: {evaluation['overall_score']}/5",
+        evaluation['overall_feedback'],
+        "\n" + _SEP
+    ])
+
+def _show_improved_essay(evaluation):
+    _write_lines(["Suggested Improved Essay:", evaluation['improved_essay'], "\n" + _SEP])
+
+# Parts of the evaluation in display order, with the fields each one needs
+_EVALUATION_SECTIONS = (
+    ((), _show_evaluation_header),
+    _evaluation_area("Organization", "organization"),
+    _evaluation_area("Development", "development"),
+    _evaluation_area("Coherence and Cohesion", "coherence"),
+    _evaluation_area("Grammar", "grammar"),
+    _evaluation_area("Vocabulary", "vocabulary"),
+    (("overall_score", "overall_feedback"), _show_overall),
+    (("improved_essay",), _show_improved_essay)
+)
 
 class TOEICEssayPractice:
     def __init__(self):
         self.api_key = None
         self.client = None
+        self._loop = None
+        self._request_slots = None
+        self._prefetched_prompt = None
         self.essay_topics = [
             "Work issues",
             "Travel and transportation choices",
@@ -30,27 +325,213 @@ class TOEICEssayPractice:
             "Explain your preference",
             "Explain the importance"
         ]
-        self.history_file = "part8_history.json"
-        self.history = self.load_history()
-        
+        self.history_file = "part8_history.jsonl"
+        self.legacy_history_file = "part8_history.json"
+        self.batches_file = "part8_batches.json"
+        self.cache_file = "part8_cache.json"
+        self.evaluation_cache_file = "part8_evaluation_cache.json"
+        self.prompts_dir = "part8_prompts"
+        self._history = None
+        self._evaluation_cache = None
+        self.cache = self.load_cache()
+    
+    @property
+    def history(self):
+        # Read on first use, so starting the program doesn't parse the whole history
+        if self._history is None:
+            self._history = self.load_history()
+        return self._history
+    
     def load_history(self):
+        history = {
+            # Only the most recent sessions are kept; older ones just count
+            # towards the totals
+            "sessions": deque(maxlen=RECENT_SESSIONS),
+            "total_sessions": 0,
+            "total_essays": 0,
+            "score_totals": [0] * len(SCORE_FIELDS),
+            # [overall score total, essay count] per topic and per essay type
+            "topic_stats": defaultdict(lambda: [0, 0]),
+            "type_stats": defaultdict(lambda: [0, 0])
+        }
+        
         if os.path.exists(self.history_file):
+            # One session per line, oldest first, added as it is read
+            damaged = False
+            with open(self.history_file, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        self._add_session(history, _json_loads(line))
+                    except json.JSONDecodeError:
+                        # Skip a line left incomplete by an interrupted write
+                        damaged = True
+            if damaged:
+                self._rewrite_history(self._intact_history_lines())
+        elif os.path.exists(self.legacy_history_file):
+            sessions = []
+            # Migrate the old single-document history to the append-only file
             try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
+                with open(self.legacy_history_file, 'rb') as f:
+                    sessions = _json_loads(f.read()).get("sessions", [])
             except json.JSONDecodeError:
-                return {"sessions": [], "total_essays": 0}
-        return {"sessions": [], "total_essays": 0}
+                pass
+            # Old records keep the whole prompt; move it to the prompt store
+            for session in sessions:
+                for essay in session["essays"]:
+                    if "prompt" in essay:
+                        prompt = essay.pop("prompt")
+                        essay["topic"] = prompt.get("topic")
+                        essay["essay_type"] = prompt.get("essay_type")
+                        essay["essay_prompt_hash"] = self._store_prompt(prompt)
+            self._rewrite_history(_json_dumps(session) + b"\n" for session in sessions)
+            for session in sessions:
+                self._add_session(history, session)
+        return history
+    
+    def _add_session(self, history, session):
+        """Add a session to the history and to its running score totals."""
+        history["sessions"].append(session)
+        history["total_sessions"] += 1
+        history["total_essays"] += len(session["essays"])
+        score_totals = history["score_totals"]
+        topic_stats = history["topic_stats"]
+        type_stats = history["type_stats"]
+        for essay in session["essays"]:
+            for i, score in enumerate(_score_row(essay["scores"])):
+                score_totals[i] += score
+            
+            overall_score = essay["scores"]["overall_score"]
+            topic_entry = topic_stats[essay.get("topic", "Unknown")]
+            topic_entry[0] += overall_score
+            topic_entry[1] += 1
+            type_entry = type_stats[essay.get("essay_type", "Unknown")]
+            type_entry[0] += overall_score
+            type_entry[1] += 1
+    
+    def _intact_history_lines(self):
+        """Yield the lines of the history log that hold a complete session."""
+        with open(self.history_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    _json_loads(line)
+                except json.JSONDecodeError:
+                    continue
+                yield line if line.endswith(b"\n") else line + b"\n"
+    
+    def _rewrite_history(self, lines):
+        # Written to a temporary file and swapped in, so an interrupted
+        # rewrite can't lose the sessions already saved
+        temp_file = self.history_file + ".tmp"
+        with open(temp_file, 'wb') as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.history_file)
+    
+    def save_history(self, session):
+        # Only the new session is written; earlier lines are never rewritten
+        with open(self.history_file, 'ab') as f:
+            f.write(_json_dumps(session) + b"\n")
+    
+    def _prompt_data(self, prompt):
+        # Sorted keys, so the same prompt always has the same bytes and hash
+        return json.dumps(prompt, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    
+    def _prompt_hash(self, prompt):
+        return hashlib.sha1(self._prompt_data(prompt)).hexdigest()
+    
+    def _store_prompt(self, prompt):
+        """Save a prompt under the hash of its content and return the hash."""
+        data = self._prompt_data(prompt)
+        prompt_hash = hashlib.sha1(data).hexdigest()
+        path = os.path.join(self.prompts_dir, prompt_hash + ".json")
+        # Identical prompts, such as ones served from the cache, are stored once
+        if not os.path.exists(path):
+            os.makedirs(self.prompts_dir, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        return prompt_hash
+    
+    def load_cache(self):
+        try:
+            with open(self.cache_file, 'rb') as f:
+                data = _json_loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return {key: deque(items, maxlen=CACHE_CAPACITY) for key, items in data.items()}
     
-    def save_history(self):
-        with open(self.history_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
+    def save_cache(self):
+        # Written to a temporary file and swapped in, so an interrupted save
+        # can't leave a truncated cache behind
+        temp_file = self.cache_file + ".tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(_json_dumps({key: list(items) for key, items in self.cache.items()}))
+        os.replace(temp_file, self.cache_file)
+    
+    def _get_cached(self, key):
+        # Reuse a previously generated prompt once enough variants are cached.
+        # Evaluations are cached separately, by the hash of the exact prompt and essay
+        cached = self.cache.get(key)
+        if not cached or len(cached) < CACHE_POOL_SIZE:
+            return None
+        # A full pool works as a fixed prompt bank and serves every request
+        if len(cached) == CACHE_CAPACITY or random.random() < CACHE_REUSE_PROBABILITY:
+            return dict(random.choice(cached))
+        return None
+    
+    def _add_to_cache(self, key, prompt):
+        # Only complete prompts are admitted
+        if all(field in prompt for field in PROMPT_FIELDS):
+            self.cache.setdefault(key, deque(maxlen=CACHE_CAPACITY)).append(prompt)
+    
+    def load_evaluation_cache(self):
+        try:
+            with open(self.evaluation_cache_file, 'rb') as f:
+                return _json_loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+    
+    def save_evaluation_cache(self):
+        temp_file = self.evaluation_cache_file + ".tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(_json_dumps(self._evaluation_cache))
+        os.replace(temp_file, self.evaluation_cache_file)
+    
+    def _essay_hash(self, prompt_hash, essay):
+        # Only differences in whitespace are ignored; any edit to the text
+        # gives a new hash, so a revised essay is always evaluated again
+        normalized = " ".join(essay.split())
+        return hashlib.sha1(f"{prompt_hash}\n{normalized}".encode("utf-8")).hexdigest()
+    
+    def _find_evaluation(self, essay_hash):
+        """Return the stored evaluation of the same essay, if there is one."""
+        if self._evaluation_cache is None:
+            self._evaluation_cache = self.load_evaluation_cache()
+        evaluation = self._evaluation_cache.get(essay_hash)
+        return dict(evaluation) if evaluation else None
+    
+    def _add_evaluation(self, essay_hash, evaluation):
+        # Only complete evaluations are admitted
+        if all(field in evaluation for field in SCORE_FIELDS):
+            self._evaluation_cache[essay_hash] = evaluation
+            # Dicts keep insertion order, so the first keys are the oldest
+            while len(self._evaluation_cache) > EVALUATION_CACHE_CAPACITY:
+                del self._evaluation_cache[next(iter(self._evaluation_cache))]
+            self.save_evaluation_cache()
     
     def setup_api(self):
+        # Imported here so that viewing statistics doesn't load the OpenAI client
+        import openai
+        
         # Check if API key is already set in environment
         self.api_key = os.environ.get("OPENAI_API_KEY")
         
         if not self.api_key:
+            from getpass import getpass
             print("\nOpenAI API key not found in environment variables.")
             self.api_key = getpass("Please enter your OpenAI API key: ")
             # Ask if user wants to save the API key to environment
@@ -61,256 +542,412 @@ class TOEICEssayPractice:
                 print("API key saved to ~/.bashrc. Please restart your terminal or run 'source ~/.bashrc' to apply.")
         
         try:
-            self.client = openai.OpenAI(api_key=self.api_key)
+            self.client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=MAX_RETRIES)
+            self._start_event_loop()
             print("API connection established successfully!")
             return True
         except Exception as e:
             print(f"Error setting up OpenAI API: {e}")
             return False
     
-    def generate_essay_prompt(self, topic=None, essay_type=None):
+    def _start_event_loop(self):
+        # API calls run on a background event loop so they can overlap while
+        # the main thread keeps reading the user's essay
+        self._loop = asyncio.new_event_loop()
+        self._request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+    
+    def _submit(self, coro):
+        """Schedule a coroutine on the background loop and return its future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    async def generate_essay_prompt(self, topic=None, essay_type=None, filling=False):
+        """Generate an essay prompt, or serve one from the cache.
+        
+        With filling, a new prompt is always generated and added to the
+        cache, and the caller saves the cache once it is done.
+        """
         if not topic:
             topic = random.choice(self.essay_topics)
         
         if not essay_type:
             essay_type = random.choice(self.essay_types)
         
-        prompt = f"""
-        Generate a realistic essay prompt for a TOEIC Writing test (Question 8).
-        The essay should be related to: {topic}
-        The essay type should be: {essay_type}
-        
-        Format the response as a JSON object with these fields:
-        - essay_prompt: The full text of the essay prompt (50-100 words)
-        - topic: The topic of the essay ({topic})
-        - essay_type: The type of essay ({essay_type})
-        - key_points: 3-5 key points that should be addressed in a good essay
-        - suggested_structure: A brief outline of how a good essay should be structured
-        - sample_essay: A sample good essay that responds to the prompt (about 300 words)
-        """
+        prompt = _ESSAY_PROMPT_REQUEST.format(
+            topic=topic,
+            essay_type=essay_type,
+            instruction=self._get_instruction_by_type(essay_type)
+        )
+        
+        cache_key = f"{topic}|{essay_type}"
+        cached = None if filling else self._get_cached(cache_key)
+        if cached:
+            return cached
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}]
-            )
+            async with self._request_slots:
+                response = await self.client.chat.completions.create(
+                    model=_GENERATION_MODEL,
+                    messages=_messages(prompt),
+                    response_format=_ESSAY_PROMPT_FORMAT,
+                    max_tokens=GENERATION_MAX_TOKENS,
+                    temperature=GENERATION_TEMPERATURE,
+                    extra_body={"prompt_cache_key": _PROMPT_CACHE_KEY}
+                )
             
-            # Parse the response content as JSON
-            try:
-                result = json.loads(response.choices[0].message.content)
-                return result
-            except json.JSONDecodeError:
-                # If JSON parsing fails, create a fallback
-                fallback_result = {
-                    "essay_prompt": f"Write an essay about {topic}. {self._get_instruction_by_type(essay_type)}",
-                    "topic": topic,
-                    "essay_type": essay_type,
-                    "key_points": ["Be clear and concise", "Use specific examples", "Organize your ideas logically", "Use appropriate grammar and vocabulary"],
-                    "suggested_structure": "Introduction with thesis statement, 2-3 body paragraphs with supporting ideas, conclusion that restates your opinion.",
-                    "sample_essay": f"This is a sample essay about {topic}. It would normally be about 300 words long and demonstrate good organization, grammar, and vocabulary."
-                }
-                
-                return fallback_result
+            # The reply follows the schema; one cut off at the token cap still
+            # fails to parse and is reported like any other error
+            result = _json_loads(response.choices[0].message.content)
+            self._add_to_cache(cache_key, result)
+            if not filling:
+                self.save_cache()
+            return result
         except Exception as e:
             print(f"Error generating essay prompt: {e}")
             return None
     
     def _get_instruction_by_type(self, essay_type):
         """Helper method to generate instructions based on essay type."""
-        if essay_type == "Express a general opinion":
-            return "Express your opinion on this topic and support it with specific reasons and examples."
-        elif essay_type == "Agree or disagree with a statement":
-            return "State whether you agree or disagree with this statement and support your position with specific reasons and examples."
-        elif essay_type == "Discuss the advantages and disadvantages":
-            return "Discuss the advantages and disadvantages of this topic, providing specific examples to support your points."
-        elif essay_type == "Explain your preference":
-            return "Explain your preference regarding this topic and support it with specific reasons and examples."
-        elif essay_type == "Explain the importance":
-            return "Explain why this topic is important and support your explanation with specific reasons and examples."
-        else:
-            return "Write a well-organized essay with a clear thesis statement, supporting paragraphs, and a conclusion."
-    
-    def evaluate_essay(self, essay, prompt):
-        evaluation_prompt = f"""
-        Evaluate the following essay written for a TOEIC Writing test (Question 8):
-        
-        Original Essay Prompt: {prompt['essay_prompt']}
-        
-        Student Essay:
-        {essay}
-        
-        Please evaluate the essay based on:
-        1. Organization (clear thesis statement, logical structure, effective conclusion)
-        2. Development (supporting ideas with specific details and examples)
-        3. Coherence and Cohesion (use of transition words and logical flow)
-        4. Grammar (grammatical accuracy and sentence structure)
-        5. Vocabulary (appropriate word choice and variety)
-        
-        Provide specific feedback for improvement in each area and an overall assessment.
-        
-        Format the response as a JSON object with these fields:
-        - organization_score: A score from 1-5 for organization
-        - development_score: A score from 1-5 for development
-        - coherence_score: A score from 1-5 for coherence and cohesion
-        - grammar_score: A score from 1-5 for grammar
-        - vocabulary_score: A score from 1-5 for vocabulary
-        - overall_score: An overall score from 1-5
-        - organization_feedback: Specific feedback on organization
-        - development_feedback: Specific feedback on development
-        - coherence_feedback: Specific feedback on coherence and cohesion
-        - grammar_feedback: Specific feedback on grammar
-        - vocabulary_feedback: Specific feedback on vocabulary
-        - overall_feedback: General feedback and suggestions for improvement
-        - improved_essay: A suggested improved version of the essay
+        return _INSTRUCTION_BY_TYPE.get(essay_type, _DEFAULT_INSTRUCTION)
+    
+    def _request_prompt(self, topic=None, essay_type=None):
+        """Return a future for an essay prompt, using the prefetched one if it matches."""
+        if self._prefetched_prompt is not None:
+            choice, future = self._prefetched_prompt
+            self._prefetched_prompt = None
+            if choice == (topic, essay_type):
+                return future
+            future.cancel()
+        return self._submit(self.generate_essay_prompt(topic, essay_type))
+    
+    async def generate_essay_prompts(self, pairs, filling=False):
+        """Generate one essay prompt per (topic, essay_type) pair concurrently."""
+        return await asyncio.gather(*(self.generate_essay_prompt(topic, essay_type, filling) for topic, essay_type in pairs))
+    
+    def fill_cache(self):
+        """Generate prompts until every topic and essay type has a full cache pool.
+        
+        Sessions are then always served from the cache, without an API call.
         """
+        pairs = []
+        for topic in self.essay_topics:
+            for essay_type in self.essay_types:
+                missing = CACHE_CAPACITY - len(self.cache.get(f"{topic}|{essay_type}", ()))
+                pairs.extend([(topic, essay_type)] * missing)
+        if not pairs:
+            print("The essay prompt cache is already full.")
+            return
+        if not self.client and not self.setup_api():
+            return
+        
+        print(f"Generating {len(pairs)} essay prompts...")
+        results = self._submit(self.generate_essay_prompts(pairs, filling=True)).result()
+        self.save_cache()
+        print(f"Added {sum(1 for result in results if result)} essay prompts to the cache.")
+    
+    def _evaluation_prompt(self, essay, prompt):
+        return _EVALUATION_REQUEST.format(essay_prompt=prompt['essay_prompt'], essay=essay)
+    
+    async def evaluate_essay(self, essay, prompt):
+        """Evaluate an essay, printing the feedback as it arrives."""
+        evaluation_prompt = self._evaluation_prompt(essay, prompt)
+        
+        # An essay resubmitted unchanged for the same prompt gets the stored
+        # evaluation instead of a new request
+        essay_hash = self._essay_hash(self._prompt_hash(prompt), essay)
+        cached = self._find_evaluation(essay_hash)
+        if cached:
+            print("\nYou submitted this essay before, so its evaluation is shown again.")
+            self.display_evaluation(cached)
+            return cached
         
         try:
-            response_eval = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": evaluation_prompt}]
-            )
-            
-            # Parse the response content as JSON
-            try:
-                result = json.loads(response_eval.choices[0].message.content)
-                return result
-            except json.JSONDecodeError:
-                # If JSON parsing fails, create a fallback
-                fallback_result = {
-                    "organization_score": 3,
-                    "development_score": 3,
-                    "coherence_score": 3,
-                    "grammar_score": 3,
-                    "vocabulary_score": 3,
-                    "overall_score": 3,
-                    "organization_feedback": "Unable to provide detailed feedback on organization. Please try again.",
-                    "development_feedback": "Unable to provide detailed feedback on development. Please try again.",
-                    "coherence_feedback": "Unable to provide detailed feedback on coherence. Please try again.",
-                    "grammar_feedback": "Unable to provide detailed feedback on grammar. Please try again.",
-                    "vocabulary_feedback": "Unable to provide detailed feedback on vocabulary. Please try again.",
-                    "overall_feedback": "Unable to provide detailed overall feedback. Please try again.",
-                    "improved_essay": "Unable to provide an improved essay. Please try again."
-                }
+            async with self._request_slots:
+                stream = await self.client.chat.completions.create(
+                    model=_EVALUATION_MODEL,
+                    messages=_messages(evaluation_prompt),
+                    response_format=_EVALUATION_FORMAT,
+                    max_tokens=EVALUATION_MAX_TOKENS,
+                    temperature=EVALUATION_TEMPERATURE,
+                    extra_body={"prompt_cache_key": _PROMPT_CACHE_KEY},
+                    stream=True
+                )
                 
-                return fallback_result
+                # Print the feedback for each area as soon as it is complete
+                parser = _JSONFieldStream()
+                printed = 0
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta and parser.consume(delta):
+                        printed = _print_sections(_EVALUATION_SECTIONS, parser.fields, printed)
+            
+            # The last field is only complete once the whole reply has arrived
+            result = _json_loads(parser.text)
+            _print_sections(_EVALUATION_SECTIONS, result, printed)
+            self._add_evaluation(essay_hash, result)
+            return result
         except Exception as e:
             print(f"Error evaluating essay: {e}")
             return None
     
-    def display_essay_prompt(self, prompt):
-        print("\n" + "=" * 80)
-        print("TOEIC Writing Test - Question 8")
-        print("=" * 80)
-        print(f"Topic: {prompt['topic']}")
-        print(f"Essay Type: {prompt['essay_type']}")
-        print("=" * 80)
-        print(prompt['essay_prompt'])
-        print("\n" + "=" * 80)
-        print("Key Points to Address:")
-        for point in prompt['key_points']:
-            print(f"- {point}")
-        print("\n" + "=" * 80)
-        print("Suggested Structure:")
-        print(prompt['suggested_structure'])
-        print("\n" + "=" * 80)
+    def _load_json_list(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return _json_loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
     
-    def display_evaluation(self, evaluation):
-        print("\n" + "=" * 80)
-        print("Essay Evaluation")
-        print("=" * 80)
+    def _save_json_list(self, path, items):
+        with open(path, 'wb') as f:
+            f.write(_json_dumps(items))
+    
+    async def batch_evaluate(self, session, essays):
+        """Submit a Batch API job evaluating the essays of a session.
         
-        print(f"Organization: {evaluation['organization_score']}/5")
-        print(evaluation['organization_feedback'])
-        print()
+        Batch jobs are cheaper than regular requests but may take up to a day;
+        collect_evaluations saves the session once the evaluations are ready.
+        """
+        lines = []
+        for i, essay in enumerate(essays):
+            lines.append(_json_dumps({
+                "custom_id": f"essay_{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": _EVALUATION_MODEL,
+                    "messages": _messages(self._evaluation_prompt(essay["user_essay"], essay["prompt"])),
+                    "response_format": _EVALUATION_FORMAT,
+                    "max_tokens": EVALUATION_MAX_TOKENS,
+                    "temperature": EVALUATION_TEMPERATURE,
+                    "prompt_cache_key": _PROMPT_CACHE_KEY
+                }
+            }) + b"\n")
         
-        print(f"Development: {evaluation['development_score']}/5")
-        print(evaluation['development_feedback'])
-        print()
+        try:
+            async with self._request_slots:
+                input_file = await self.client.files.create(file=("part8_batch.jsonl", b"".join(lines)), purpose="batch")
+                batch = await self.client.batches.create(
+                    input_file_id=input_file.id,
+                    endpoint="/v1/chat/completions",
+                    completion_window="24h"
+                )
+        except Exception as e:
+            print(f"Error submitting batch: {e}")
+            return False
         
-        print(f"Coherence and Cohesion: {evaluation['coherence_score']}/5")
-        print(evaluation['coherence_feedback'])
-        print()
+        # Keep the session and its essays until the batch is collected
+        pending = self._load_json_list(self.batches_file)
+        pending.append({"id": batch.id, "session": session, "essays": essays})
+        self._save_json_list(self.batches_file, pending)
+        print(f"Submitted batch {batch.id} with {len(lines)} essays.")
+        return True
+    
+    def collect_evaluations(self):
+        """Show and save the sessions of finished evaluation batch jobs."""
+        if not self.client and not self.setup_api():
+            return
         
-        print(f"Grammar: {evaluation['grammar_score']}/5")
-        print(evaluation['grammar_feedback'])
-        print()
+        for session in self._submit(self._collect_batches()).result():
+            self._finish_session(session)
+    
+    async def _collect_batches(self):
+        """Fetch finished evaluation batch jobs and return their sessions."""
+        pending = self._load_json_list(self.batches_file)
+        if not pending:
+            print("No batch jobs pending.")
+            return []
         
-        print(f"Vocabulary: {evaluation['vocabulary_score']}/5")
-        print(evaluation['vocabulary_feedback'])
-        print()
+        sessions = []
+        still_pending = []
+        for entry in pending:
+            try:
+                batch = await self.client.batches.retrieve(entry['id'])
+            except Exception as e:
+                print(f"Error checking batch {entry['id']}: {e}")
+                still_pending.append(entry)
+                continue
+            
+            if batch.status in ("failed", "expired", "cancelled"):
+                print(f"Batch {batch.id} {batch.status}; discarding it.")
+                continue
+            if batch.status != "completed":
+                print(f"Batch {batch.id} is still {batch.status}.")
+                still_pending.append(entry)
+                continue
+            
+            try:
+                output = await self.client.files.content(batch.output_file_id)
+            except Exception as e:
+                print(f"Error downloading batch {batch.id}: {e}")
+                still_pending.append(entry)
+                continue
+            
+            # Results may come back in any order, so they are matched by custom_id
+            evaluations = {}
+            for line in output.content.splitlines():
+                if not line.strip():
+                    continue
+                result = _json_loads(line)
+                response = result.get('response') or {}
+                if response.get('status_code') != 200:
+                    continue
+                try:
+                    evaluations[result['custom_id']] = _json_loads(response['body']['choices'][0]['message']['content'])
+                except (KeyError, IndexError, TypeError, ValueError):
+                    continue
+            
+            session = entry['session']
+            print(f"\nSession of {session['date']} ({len(evaluations)}/{len(entry['essays'])} essays evaluated)")
+            for i, essay in enumerate(entry['essays']):
+                evaluation = evaluations.get(f"essay_{i}")
+                if not evaluation:
+                    continue
+                self.display_evaluation(evaluation)
+                session["essays"].append(self._essay_record(essay["prompt"], essay["user_essay"], evaluation))
+            sessions.append(session)
         
-        print("=" * 80)
-        print(f"Overall Score: {evaluation['overall_score']}/5")
-        print(evaluation['overall_feedback'])
-        print("\n" + "=" * 80)
+        self._save_json_list(self.batches_file, still_pending)
+        return sessions
+    
+    def _essay_record(self, prompt, user_essay, evaluation):
+        # The history keeps only the prompt's hash; the full prompt, with its
+        # sample essay, is kept once in the prompt store
+        return {
+            "topic": prompt.get("topic"),
+            "essay_type": prompt.get("essay_type"),
+            "essay_prompt_hash": self._store_prompt(prompt),
+            "user_essay": user_essay,
+            "scores": {field: evaluation[field] for field in SCORE_FIELDS},
+            "feedback": evaluation["overall_feedback"]
+        }
+    
+    def _finish_session(self, session):
+        # Calculate average score for the session
+        if session["essays"]:
+            total_score = sum(essay["scores"]["overall_score"] for essay in session["essays"])
+            session["average_score"] = total_score / len(session["essays"])
         
-        print("Suggested Improved Essay:")
-        print(evaluation['improved_essay'])
-        print("\n" + "=" * 80)
+        # Update history
+        self._add_session(self.history, session)
+        self.save_history(session)
+    
+    async def _preload(self):
+        """Read the history and evaluation cache in worker threads."""
+        if self._history is None:
+            self._history = await asyncio.to_thread(self.load_history)
+        if self._evaluation_cache is None:
+            self._evaluation_cache = await asyncio.to_thread(self.load_evaluation_cache)
+    
+    async def _countdown(self, time_limit):
+        """Print the remaining time every 5 minutes, and every 10 seconds in the last minute."""
+        remaining = time_limit
+        while remaining > 0:
+            # Sleep until the next 5-minute mark, stopping at the last minute,
+            # then in 10-second steps
+            if remaining > 60:
+                step = min(remaining % 300 or 300, remaining - 60)
+            else:
+                step = remaining % 10 or 10
+            await asyncio.sleep(step)
+            remaining -= step
+            if remaining > 60:
+                print(f"\nRemaining time: {remaining // 60} minutes")
+            elif remaining > 0:
+                print(f"\nRemaining time: {remaining} seconds")
+        print("\nTime's up! Press Enter to submit your essay.")
+    
+    def display_essay_prompt(self, prompt):
+        lines = [
+            "\n" + _SEP,
+            "TOEIC Writing Test - Question 8",
+            _SEP,
+            f"Topic: {prompt['topic']}",
+            f"Essay Type: {prompt['essay_type']}",
+            _SEP,
+            prompt['essay_prompt'],
+            "\n" + _SEP,
+            "Key Points to Address:"
+        ]
+        lines.extend(f"- {point}" for point in prompt['key_points'])
+        lines += [
+            "\n" + _SEP,
+            "Suggested Structure:",
+            prompt['suggested_structure'],
+            "\n" + _SEP
+        ]
+        _write_lines(lines)
+    
+    def display_evaluation(self, evaluation):
+        _print_sections(_EVALUATION_SECTIONS, evaluation)
     
     def display_statistics(self):
         if not self.history["sessions"]:
             print("\nNo practice sessions found. Start practicing to see your statistics!")
             return
         
-        print("\n" + "=" * 80)
-        print("TOEIC Essay Practice Statistics")
-        print("=" * 80)
-        
-        total_sessions = len(self.history["sessions"])
+        total_sessions = self.history["total_sessions"]
         total_essays = self.history["total_essays"]
         
-        print(f"Total Practice Sessions: {total_sessions}")
-        print(f"Total Essays Written: {total_essays}")
-        print()
-        
-        # Calculate average scores
-        avg_organization = 0
-        avg_development = 0
-        avg_coherence = 0
-        avg_grammar = 0
-        avg_vocabulary = 0
-        avg_overall = 0
-        
-        for session in self.history["sessions"]:
-            for essay in session["essays"]:
-                avg_organization += essay["scores"]["organization_score"]
-                avg_development += essay["scores"]["development_score"]
-                avg_coherence += essay["scores"]["coherence_score"]
-                avg_grammar += essay["scores"]["grammar_score"]
-                avg_vocabulary += essay["scores"]["vocabulary_score"]
-                avg_overall += essay["scores"]["overall_score"]
+        lines = [
+            "\n" + _SEP,
+            "TOEIC Essay Practice Statistics",
+            _SEP,
+            f"Total Practice Sessions: {total_sessions}",
+            f"Total Essays Written: {total_essays}",
+            ""
+        ]
         
+        # Averages come from the running totals, so no essay is revisited
         if total_essays > 0:
-            avg_organization /= total_essays
-            avg_development /= total_essays
-            avg_coherence /= total_essays
-            avg_grammar /= total_essays
-            avg_vocabulary /= total_essays
-            avg_overall /= total_essays
+            avg_organization, avg_development, avg_coherence, avg_grammar, avg_vocabulary, avg_overall = (
+                total / total_essays for total in self.history["score_totals"]
+            )
             
-            print("Average Scores:")
-            print(f"Organization: {avg_organization:.2f}/5")
-            print(f"Development: {avg_development:.2f}/5")
-            print(f"Coherence and Cohesion: {avg_coherence:.2f}/5")
-            print(f"Grammar: {avg_grammar:.2f}/5")
-            print(f"Vocabulary: {avg_vocabulary:.2f}/5")
-            print(f"Overall: {avg_overall:.2f}/5")
+            lines += [
+                "Average Scores:",
+                f"Organization: {avg_organization:.2f}/5",
+                f"Development: {avg_development:.2f}/5",
+                f"Coherence and Cohesion: {avg_coherence:.2f}/5",
+                f"Grammar: {avg_grammar:.2f}/5",
+                f"Vocabulary: {avg_vocabulary:.2f}/5",
+                f"Overall: {avg_overall:.2f}/5"
+            ]
+            
+            lines.append("\nPerformance by Topic:")
+            lines.extend(
+                f"{topic}: {score / count:.1f}/5 ({count} essays)"
+                for topic, (score, count) in self.history["topic_stats"].items()
+            )
+            lines.append("\nPerformance by Essay Type:")
+            lines.extend(
+                f"{essay_type}: {score / count:.1f}/5 ({count} essays)"
+                for essay_type, (score, count) in self.history["type_stats"].items()
+            )
+        
+        lines += ["\n" + _SEP, "Recent Practice Sessions:"]
+        
+        # Display the most recent sessions
+        for i, session in enumerate(reversed(self.history["sessions"])):
+            lines += [
+                f"\nSession {total_sessions - i}: {session['date']}",
+                f"Essay Topic: {session['topic']}",
+                f"Essay Type: {session['essay_type']}",
+                f"Number of Essays: {len(session['essays'])}",
+                f"Average Score: {session['average_score']:.2f}/5"
+            ]
+        _write_lines(lines)
+
+    def run_practice_session(self, topic=None, essay_type=None, evaluate_later=False):
+        """Run a complete practice session with one essay.
+        
+        With evaluate_later, the essay is evaluated by a Batch API job instead,
+        and the session is saved when the evaluation is collected.
+        """
+        if not self.client and not self.setup_api():
+            return
         
-        print("\n" + "=" * 80)
-        print("Recent Practice Sessions:")
-        
-        # Display the 5 most recent sessions
-        recent_sessions = self.history["sessions"][-5:]
-        for i, session in enumerate(reversed(recent_sessions)):
-            print(f"\nSession {len(self.history['sessions']) - i}: {session['date']}")
-            print(f"Essay Topic: {session['topic']}")
-            print(f"Essay Type: {session['essay_type']}")
-            print(f"Number of Essays: {len(session['essays'])}")
-            print(f"Average Score: {session['average_score']:.2f}/5")
-
-    def run_practice_session(self, topic=None, essay_type=None):
-        """Run a complete practice session with one essay."""
         # Create a new session record
         session = {
             "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -320,9 +957,11 @@ class TOEICEssayPractice:
             "average_score": 0
         }
         
-        # Generate an essay prompt
-        print("\nGenerating essay prompt...")
-        prompt = self.generate_essay_prompt(topic, essay_type)
+        # Generate an essay prompt, unless one was prepared during the last session
+        next_prompt = self._request_prompt(topic, essay_type)
+        if not next_prompt.done():
+            print("\nGenerating essay prompt...")
+        prompt = next_prompt.result()
         
         if not prompt:
             print("Failed to generate an essay prompt. Please try again.")
@@ -331,75 +970,93 @@ class TOEICEssayPractice:
         # Display the essay prompt
         self.display_essay_prompt(prompt)
         
+        # The prompt for the next session is generated while the user writes;
+        # it is used if the next session asks for the same topic and essay type
+        self._prefetched_prompt = ((topic, essay_type), self._submit(self.generate_essay_prompt(topic, essay_type)))
+        
+        # The files needed once the essay is evaluated are read in the
+        # meantime as well
+        preload = None if evaluate_later else self._submit(self._preload())
+        
         # Get user's essay
-        print("\nWrite your essay. Press Enter twice when finished.")
+        if _STDIN_BLOCK:
+            print("\nWrite your essay. Press Ctrl-D (Ctrl-Z then Enter on Windows) when finished.")
+        else:
+            print("\nWrite your essay. Press Enter twice when finished.")
         print("You have 30 minutes to complete your essay.")
         
-        # Start a timer
-        start_time = time.time()
-        time_limit = 30 * 60  # 30 minutes in seconds
+        # The remaining time is announced from the background loop, so it
+        # doesn't depend on when the user presses Enter
+        deadline = time.monotonic() + ESSAY_TIME_LIMIT
+        countdown = self._submit(self._countdown(ESSAY_TIME_LIMIT))
         
-        # Collect user's essay
-        user_essay = ""
-        while True:
-            line = input()
-            if not line and user_essay:  # Empty line and we already have some content
-                break
-            user_essay += line + "\n"
-            
-            # Check if time is up
-            elapsed_time = time.time() - start_time
-            if elapsed_time >= time_limit:
+        if _STDIN_BLOCK:
+            # Read everything up to the end of input in one call
+            user_essay = sys.stdin.read().strip()
+            word_count = len(user_essay.split())
+            if time.monotonic() >= deadline:
                 print("\nTime's up! Your essay has been submitted.")
-                break
-            
-            # Show remaining time every 5 minutes
-            remaining_time = time_limit - elapsed_time
-            if remaining_time <= 60 and int(remaining_time) % 10 == 0:  # Every 10 seconds in the last minute
-                print(f"\nRemaining time: {int(remaining_time)} seconds")
-            elif int(elapsed_time) % 300 == 0 and elapsed_time > 0:  # Every 5 minutes
-                print(f"\nRemaining time: {int(remaining_time / 60)} minutes")
+        else:
+            # Collect user's essay line by line and join it once at the end,
+            # counting the words as each line comes in
+            lines = []
+            word_count = 0
+            while True:
+                line = input()
+                if not line and lines:  # Empty line and we already have some content
+                    break
+                lines.append(line)
+                word_count += len(line.split())
+                
+                # Check if time is up
+                if time.monotonic() >= deadline:
+                    print("\nTime's up! Your essay has been submitted.")
+                    break
+            user_essay = "\n".join(lines)
+        countdown.cancel()
+        
+        print(f"\nYour essay has {word_count} words.")
+        if word_count < MIN_ESSAY_WORDS:
+            print(f"TOEIC essays should be at least {MIN_ESSAY_WORDS} words long.")
+        
+        if evaluate_later:
+            essays = [{"prompt": prompt, "user_essay": user_essay}]
+            if self._submit(self.batch_evaluate(session, essays)).result():
+                print("\nPractice session completed. Collect your evaluation from the main menu once the batch has finished.")
+            return
         
         # Evaluate the essay
         print("\nEvaluating your essay...")
-        evaluation = self.evaluate_essay(user_essay, prompt)
+        preload.result()
+        evaluation = self._submit(self.evaluate_essay(user_essay, prompt)).result()
         
         if not evaluation:
             print("Failed to evaluate your essay. Please try again.")
             return
         
-        # Display the evaluation
-        self.display_evaluation(evaluation)
-        
         # Record the essay in the session
-        essay_record = {
-            "prompt": prompt,
-            "user_essay": user_essay,
-            "scores": {
-                "organization_score": evaluation["organization_score"],
-                "development_score": evaluation["development_score"],
-                "coherence_score": evaluation["coherence_score"],
-                "grammar_score": evaluation["grammar_score"],
-                "vocabulary_score": evaluation["vocabulary_score"],
-                "overall_score": evaluation["overall_score"]
-            },
-            "feedback": evaluation["overall_feedback"]
-        }
-        
-        session["essays"].append(essay_record)
-        
-        # Calculate average score for the session
-        if session["essays"]:
-            total_score = sum(essay["scores"]["overall_score"] for essay in session["essays"])
-            session["average_score"] = total_score / len(session["essays"])
-        
-        # Update history
-        self.history["sessions"].append(session)
-        self.history["total_essays"] += len(session["essays"])
-        self.save_history()
+        session["essays"].append(self._essay_record(prompt, user_essay, evaluation))
+        self._finish_session(session)
         
         print("\nPractice session completed. Your progress has been saved.")
 
+def _choose_from(items, label, noun):
+    """List the items and return the one the user picks, or None if the input is invalid."""
+    print(f"\nAvailable {label}:")
+    for i, item in enumerate(items, 1):
+        print(f"{i}. {item}")
+    
+    item_choice = input(f"\nChoose {noun} (1-{len(items)}): ")
+    try:
+        item_index = int(item_choice) - 1
+    except ValueError:
+        print("Invalid input. Please enter a number.")
+        return None
+    if not 0 <= item_index < len(items):
+        print("Invalid choice. Please try again.")
+        return None
+    return items[item_index]
+
 def main():
     practice = TOEICEssayPractice()
     
@@ -410,9 +1067,9 @@ def main():
     print("You will be given an essay prompt and asked to write an opinion essay.")
     print("Your essay will be evaluated based on organization, development, coherence, grammar, and vocabulary.")
     
-    # Set up API connection
-    if not practice.setup_api():
-        print("Failed to set up API connection. Exiting.")
+    # --fill-cache generates a full pool of prompts for every topic and essay type
+    if "--fill-cache" in sys.argv[1:]:
+        practice.fill_cache()
         return
     
     while True:
@@ -424,76 +1081,39 @@ def main():
         print("3. Choose a specific essay type for practice")
         print("4. Choose both topic and essay type for practice")
         print("5. View your practice statistics")
-        print("6. Exit")
+        print("6. Start a practice session evaluated later with the Batch API (lower cost)")
+        print("7. Collect Batch API evaluations")
+        print("8. Exit")
         
-        choice = input("\nEnter your choice (1-6): ")
+        try:
+            choice = input("\nEnter your choice (1-8): ")
+        except EOFError:
+            # Input was piped in and has run out
+            choice = "8"
         
         if choice == "1":
             practice.run_practice_session()
         elif choice == "2":
-            print("\nAvailable Essay Topics:")
-            for i, topic in enumerate(practice.essay_topics, 1):
-                print(f"{i}. {topic}")
-            
-            topic_choice = input(f"\nChoose a topic (1-{len(practice.essay_topics)}): ")
-            try:
-                topic_index = int(topic_choice) - 1
-                if 0 <= topic_index < len(practice.essay_topics):
-                    selected_topic = practice.essay_topics[topic_index]
-                    practice.run_practice_session(selected_topic)
-                else:
-                    print("Invalid choice. Please try again.")
-            except ValueError:
-                print("Invalid input. Please enter a number.")
+            selected_topic = _choose_from(practice.essay_topics, "Essay Topics", "a topic")
+            if selected_topic:
+                practice.run_practice_session(selected_topic)
         elif choice == "3":
-            print("\nAvailable Essay Types:")
-            for i, essay_type in enumerate(practice.essay_types, 1):
-                print(f"{i}. {essay_type}")
-            
-            type_choice = input(f"\nChoose an essay type (1-{len(practice.essay_types)}): ")
-            try:
-                type_index = int(type_choice) - 1
-                if 0 <= type_index < len(practice.essay_types):
-                    selected_type = practice.essay_types[type_index]
-                    practice.run_practice_session(None, selected_type)
-                else:
-                    print("Invalid choice. Please try again.")
-            except ValueError:
-                print("Invalid input. Please enter a number.")
+            selected_type = _choose_from(practice.essay_types, "Essay Types", "an essay type")
+            if selected_type:
+                practice.run_practice_session(None, selected_type)
         elif choice == "4":
-            # Choose topic
-            print("\nAvailable Essay Topics:")
-            for i, topic in enumerate(practice.essay_topics, 1):
-                print(f"{i}. {topic}")
-            
-            topic_choice = input(f"\nChoose a topic (1-{len(practice.essay_topics)}): ")
-            try:
-                topic_index = int(topic_choice) - 1
-                if 0 <= topic_index < len(practice.essay_topics):
-                    selected_topic = practice.essay_topics[topic_index]
-                    
-                    # Choose essay type
-                    print("\nAvailable Essay Types:")
-                    for i, essay_type in enumerate(practice.essay_types, 1):
-                        print(f"{i}. {essay_type}")
-                    
-                    type_choice = input(f"\nChoose an essay type (1-{len(practice.essay_types)}): ")
-                    try:
-                        type_index = int(type_choice) - 1
-                        if 0 <= type_index < len(practice.essay_types):
-                            selected_type = practice.essay_types[type_index]
-                            practice.run_practice_session(selected_topic, selected_type)
-                        else:
-                            print("Invalid essay type choice. Please try again.")
-                    except ValueError:
-                        print("Invalid input. Please enter a number.")
-                else:
-                    print("Invalid topic choice. Please try again.")
-            except ValueError:
-                print("Invalid input. Please enter a number.")
+            selected_topic = _choose_from(practice.essay_topics, "Essay Topics", "a topic")
+            if selected_topic:
+                selected_type = _choose_from(practice.essay_types, "Essay Types", "an essay type")
+                if selected_type:
+                    practice.run_practice_session(selected_topic, selected_type)
         elif choice == "5":
             practice.display_statistics()
         elif choice == "6":
+            practice.run_practice_session(evaluate_later=True)
+        elif choice == "7":
+            practice.collect_evaluations()
+        elif choice == "8":
             print("\nThank you for using TOEIC Writing Practice. Goodbye!")
             break
         else: